@@ -4,6 +4,13 @@
 export SECRET_KEY="your-secret-key"
 export DATABASE_URL="sqlite:///./test.db"
 
+# Clerk token verification (CLERK_JWKS_URL defaults to the Backend API, which needs the secret key)
+export CLERK_SECRET_KEY="clerk-secret-key"
+# export CLERK_JWKS_URL="https://your-app.clerk.accounts.dev/.well-known/jwks.json"
+# export CLERK_ISSUER="https://your-app.clerk.accounts.dev"
+# Development only: accept tokens without checking their signature
+# export AUTH_ALLOW_UNVERIFIED_TOKENS="true"
+
 export GOOGLE_CLIENT_ID="goog-client-id"
 export GOOGLE_CLIENT_SECRET="goog-client-secret"
 export GOOGLE_REDIRECT_URI="http://localhost:8000/api/v1/auth/google/callback"
@@ -1,72 +1,144 @@
 from fastapi import Header, HTTPException
-from typing import Optional
-from jose import jwt, JWTError
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from jose import jwt, JWTError, ExpiredSignatureError
 from app.core.config import settings
-import base64
-import json
+from app.models.api_endpoint import APIEndpoint
+from app.services.endpoint_cache import ResolvedEndpoint, endpoint_cache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import hashlib
 import httpx
 import time
 
-# Cache for Clerk's public key
-CLERK_PUBLIC_KEY = None
-CLERK_PUBLIC_KEY_EXPIRY = 0
 
-async def get_clerk_public_key():
-    """Fetch Clerk's public key for JWT verification"""
-    global CLERK_PUBLIC_KEY, CLERK_PUBLIC_KEY_EXPIRY
-    
-    # Return cached key if still valid
-    if CLERK_PUBLIC_KEY and time.time() < CLERK_PUBLIC_KEY_EXPIRY:
-        return CLERK_PUBLIC_KEY
-    
-    try:
-        # Fetch Clerk's public key
-        async with httpx.AsyncClient() as client:
-            response = await client.get("https://api.clerk.com/v1/jwks")
-            jwks = response.json()
-            
-            # For now, use the first key (in production, you'd match by kid)
-            if jwks.get("keys"):
-                key_data = jwks["keys"][0]
-                # Convert JWK to PEM format (simplified)
-                # In production, you'd use a proper JWK to PEM converter
-                CLERK_PUBLIC_KEY = key_data
-                CLERK_PUBLIC_KEY_EXPIRY = time.time() + 3600  # Cache for 1 hour
-                return CLERK_PUBLIC_KEY
-            else:
-                raise Exception("No public keys found")
-                
-    except Exception as e:
-        print(f"Error fetching Clerk public key: {e}")
-        return None
+class ClerkJwks:
+    """Clerk signing keys indexed by kid, fetched over one shared client
+
+    Keys older than the refresh interval keep being served while a background
+    task refetches them; only the first fetch and unknown kids (key rotation)
+    wait on the network. Those fetches happen at most every min_refetch seconds,
+    including while no keys could be fetched yet (callers answer 503 meanwhile).
+    """
+
+    def __init__(self, url: str, refresh_seconds: float, min_refetch_seconds: float):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self.min_refetch_seconds = min_refetch_seconds
+        self.keys: Dict[str, Dict[str, Any]] = {}
+        self.fetched_at = float("-inf")  # Never fetched: the first lookup always fetches
+        self._http: Optional[httpx.AsyncClient] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get(self, kid: str) -> Optional[Dict[str, Any]]:
+        age = time.monotonic() - self.fetched_at
+        if kid not in self.keys and age >= self.min_refetch_seconds:
+            await self._refresh()
+        elif age >= self.refresh_seconds and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self.keys.get(kid)
+
+    async def _refresh(self) -> None:
+        fetched_at = self.fetched_at
+        async with self._lock:
+            if self.fetched_at != fetched_at:
+                return  # Another request refreshed while we waited
+            try:
+                if self._http is None:
+                    self._http = httpx.AsyncClient(timeout=10.0)
+                headers = {}
+                # The Backend API JWKS needs the secret key; never send it anywhere else
+                if settings.CLERK_SECRET_KEY and self.url.startswith("https://api.clerk.com/"):
+                    headers["Authorization"] = f"Bearer {settings.CLERK_SECRET_KEY}"
+                response = await self._http.get(self.url, headers=headers)
+                response.raise_for_status()
+                keys = {key["kid"]: key for key in response.json().get("keys", []) if key.get("kid")}
+                if not keys:
+                    raise ValueError("No public keys found")
+                self.keys = keys
+            except Exception as e:
+                print(f"Error fetching Clerk JWKS: {e}")
+            # Failed fetches also count, so an outage does not trigger a fetch per request
+            self.fetched_at = time.monotonic()
+
+    async def aclose(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of sha256(token) -> verified claims, each kept until the token's exp"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry[1]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: bytes, claims: Dict[str, Any]) -> None:
+        self._entries[key] = (claims, float(claims["exp"]))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+clerk_jwks = ClerkJwks(settings.CLERK_JWKS_URL, settings.CLERK_JWKS_REFRESH_SECONDS, settings.CLERK_JWKS_MIN_REFETCH_SECONDS)
+verified_tokens = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
 
 async def verify_clerk_token(token: str) -> dict:
-    """Verify a Clerk JWT token and return the payload"""
+    """Verify a Clerk JWT (RS256 against the key named by its kid) and return the payload"""
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = verified_tokens.get(cache_key)
+    if payload is not None:
+        return payload
+    
     try:
-        # Get Clerk's public key
-        public_key = await get_clerk_public_key()
+        header = jwt.get_unverified_header(token)
+        if settings.AUTH_ALLOW_UNVERIFIED_TOKENS:
+            # Development only: trust the token without checking its signature
+            payload = jwt.get_unverified_claims(token)
+            exp = payload.get("exp")
+            if exp and time.time() > exp:
+                raise HTTPException(status_code=401, detail="Token expired")
+        else:
+            if header.get("alg") != "RS256":
+                raise HTTPException(status_code=401, detail="Invalid JWT token: unsupported algorithm")
+            public_key = await clerk_jwks.get(header.get("kid", ""))
+            if public_key is None:
+                if not clerk_jwks.keys:
+                    raise HTTPException(status_code=503, detail="Authentication keys unavailable")
+                raise HTTPException(status_code=401, detail="Invalid JWT token: unknown signing key")
+            payload = jwt.decode(
+                token,
+                public_key,
+                algorithms=["RS256"],
+                issuer=settings.CLERK_ISSUER,
+                options={"verify_aud": False, "require_exp": True}
+            )
         
-        if not public_key:
-            # Fallback to unverified decode for development
-            print("⚠️ Warning: Using unverified JWT decode (development mode)")
-            return jwt.decode(token, key=None, options={"verify_signature": False})
-        
-        # For now, we'll use unverified decode but log the attempt
-        # In production, you'd implement proper JWK to PEM conversion
-        print("🔒 Attempting to verify Clerk token...")
-        payload = jwt.decode(token, key=None, options={"verify_signature": False})
-        
-        # Basic validation
         if not payload.get("sub"):
             raise HTTPException(status_code=401, detail="Invalid token: missing user ID")
-        
-        # Check expiration
-        exp = payload.get("exp")
-        if exp and time.time() > exp:
-            raise HTTPException(status_code=401, detail="Token expired")
-        
+        if not settings.AUTH_ALLOW_UNVERIFIED_TOKENS:
+            verified_tokens.put(cache_key, payload)
         return payload
         
+    except HTTPException:
+        raise
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Invalid JWT token: {str(e)}")
     except Exception as e:
@@ -76,30 +148,21 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> str:
     if not authorization:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    try:
-        # Extract token from Authorization header
-        token = authorization.replace('Bearer ', '')
-        
-        # Debug: Let's see what's in the token
-        print(f"🔍 Token received: {token[:50]}...")
-        
-        # Verify the token with Clerk
-        payload = await verify_clerk_token(token)
-        print(f"🔍 Token payload: {json.dumps(payload, indent=2)}")
-        
-        # Extract user ID
-        user_id = payload.get("sub")
-        if not user_id:
-            print(f"❌ No user ID found in token payload")
-            print(f"Available fields: {list(payload.keys())}")
-            raise HTTPException(status_code=401, detail="Invalid token: missing user ID")
-        
-        print(f"✅ Found user ID: {user_id}")
-        return user_id
-            
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        print(f"❌ Authentication error: {e}")
-        raise HTTPException(status_code=401, detail="Authentication failed") 
\ No newline at end of file
+    # Extract token from Authorization header
+    token = authorization.replace('Bearer ', '')
+    payload = await verify_clerk_token(token)
+    return payload["sub"]
+
+async def get_api_endpoint(db: AsyncSession, endpoint_id: str, current_user: str) -> ResolvedEndpoint:
+    """Resolve an endpoint owned by current_user, served from the endpoint cache when possible"""
+    hit, api_endpoint = endpoint_cache.get(endpoint_id, current_user)
+    if not hit:
+        result = await db.execute(select(APIEndpoint).where(
+            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
+            APIEndpoint.user_id == current_user
+        ))
+        api_endpoint = endpoint_cache.put(endpoint_id, current_user, result.scalars().first())
+    
+    if not api_endpoint:
+        raise HTTPException(status_code=404, detail="API endpoint not found")
+    return api_endpoint
@@ -1,82 +1,239 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+import hashlib
+import json
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from typing import Optional, List, Dict, Any
-from app.services.google_sheets import GoogleSheetsService
-from app.models.api_endpoint import APIEndpoint
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, field_validator
+from app.services.google_sheets import sheets_service
+from app.core.config import settings
+from app.services.cursors import decode_cursor, encode_cursor, query_key
+from app.services.aggregation import MAX_MEMOIZED_AGGREGATES, aggregate, parse_metrics
+from app.services.row_filter import RowFilter
+from app.services.table_export import ARROW_MEDIA_TYPE, iter_csv, to_arrow_ipc, to_columnar
+from app.services.response_cache import CachedResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_api_endpoint, get_current_user
 
 router = APIRouter()
-sheets_service = GoogleSheetsService()
+
+# Rows serialized per chunk when streaming (bounds memory and keeps writes large enough)
+STREAM_CHUNK_ROWS = 500
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json_stream": "application/json",
+    "csv": "text/csv",
+}
+# Machine-oriented formats return every row unless a limit is given
+BULK_FORMATS = {"ndjson", "json_stream", "csv", "columnar", "arrow"}
+# Formats whose encoded bodies go to the response cache (streams stay streams)
+CACHED_FORMATS = {"json", "columnar", "arrow"}
+
+class BatchOperation(BaseModel):
+    op: str  # "insert", "update" or "delete"
+    row_index: Optional[int] = None  # Index-based update/delete
+    where: Optional[Dict[str, str]] = None  # Field criteria for update/delete, or insert after last match
+    position: Optional[str] = None  # Insert position: 'beg', 'end', or row index number
+    data: Optional[Dict[str, Any]] = None
+
+    @field_validator("where")
+    @classmethod
+    def where_not_empty(cls, where: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        # An empty where would match (and overwrite or delete) every row
+        if where is not None and not where:
+            raise ValueError("At least one field criteria must be provided")
+        return where
 
 @router.get("/data/{endpoint_id}")
 async def get_dynamic_data(
     endpoint_id: str,
-    limit: Optional[int] = Query(100, ge=1, le=1000),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default 100, max 1000 for format=json; other formats return every row when omitted)"),
     offset: Optional[int] = Query(0, ge=0),
     sort_by: Optional[str] = None,
     sort_order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
+    pagination: Optional[str] = Query("offset", regex="^(offset|cursor)$", description="cursor: pin the snapshot and return next_cursor for consistent paging"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; sort, filter and search come from the cursor"),
+    filter_expr: Optional[str] = Query(None, alias="filter", description="Row filter, e.g. age gt 30 and (city in (Paris, Rome) or name startswith A)"),
+    search: Optional[str] = Query(None, description="Full-text search across all columns; results are ranked unless sort_by is given"),
+    pushdown: Optional[bool] = Query(False, description="For very large uncached ranges: fetch only the requested window (total is null unless it reaches the last row)"),
+    format: Optional[str] = Query("json", regex="^(json|ndjson|json_stream|csv|columnar|arrow)$", description="json envelope, ndjson (one row per line), json_stream (chunked JSON array), csv, columnar JSON or arrow (IPC stream)"),
     debug: Optional[bool] = Query(False, description="Show debug information"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Get data from a Google Sheet via dynamic endpoint"""
+    if format not in BULK_FORMATS:
+        if limit is None:
+            limit = 100
+        elif limit > 1000:
+            raise HTTPException(status_code=422, detail="limit must be at most 1000 (use format=ndjson, csv, columnar or arrow for exports)")
+    
+    cursor_state = None
+    if cursor:
+        try:
+            cursor_state = decode_cursor(cursor, settings.JWT_SECRET_KEY)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if cursor_state.get("e") != endpoint_id:
+            raise HTTPException(status_code=400, detail="Cursor belongs to a different endpoint")
+        # The cursor carries the query, so its rows keep the order of the first page
+        sort_by, sort_order, filter_expr, search = cursor_state["s"]
+        offset = cursor_state["o"]
+        pagination = "cursor"
+    
+    row_filter = None
+    if filter_expr:
+        try:
+            row_filter = RowFilter.parse(filter_expr)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+    
     try:
-        # 1. Look up the endpoint in database and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
-        
-        # 2. Get data from Google Sheets
-        sheet_data = await sheets_service.get_sheet_data(
-            api_endpoint.sheet_id, 
-            api_endpoint.sheet_range
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
+        
+        # 2. On request, unfiltered, unsorted reads of large, uncached ranges fetch only the requested page
+        page = None
+        ordering = query_key(sort_by, sort_order, filter_expr, search)
+        if pushdown and not sort_by and not row_filter and not search and limit is not None and pagination == "offset":
+            page = await sheets_service.get_page(
+                api_endpoint.sheet_id,
+                api_endpoint.sheet_range,
+                offset,
+                limit,
+                api_endpoint.cache_ttl_seconds
+            )
+        
+        if page:
+            table = page.table
+            total_count = page.total
+            has_more = page.has_more
+            page_positions = table.positions()
+        elif cursor_state:
+            # Later cursor pages reuse the pinned snapshot and its row order: no refetch, no re-sort
+            pinned = sheets_service.cursor_pins.get(cursor_state["v"], ordering)
+            if pinned is None:
+                raise HTTPException(status_code=410, detail="Cursor expired; restart pagination without a cursor")
+            snapshot, positions = pinned
+            table = snapshot.table
+        else:
+            # Get the (cached) columnar snapshot from Google Sheets
+            snapshot = await sheets_service.get_snapshot(
+                api_endpoint.sheet_id, 
+                api_endpoint.sheet_range,
+                api_endpoint.cache_ttl_seconds
+            )
+            table = snapshot.table
+        
+        # Conditional GET: the ETag covers the data and every query parameter, so an
+        # unchanged sheet answers 304 before anything is sorted or serialized
+        etag = _etag(
+            page.content_hash if page else snapshot.content_hash,
+            sorted(request.query_params.multi_items()),
+            # Cursor pages embed the snapshot version in next_cursor
+            snapshot.version if pagination == "cursor" and not page else None
         )
+        matched_etag = _etag_matches(request.headers.get("if-none-match"), etag)
+        if matched_etag:
+            return Response(status_code=304, headers={"ETag": matched_etag, "Vary": "Accept-Encoding"})
         
-        # 3. Apply basic filtering and pagination
-        if sort_by and sheet_data:
-            # Improved sorting with case-insensitive column matching and better handling of missing values
-            reverse = sort_order == "desc"
+        # Hot offset queries on a cached snapshot are served from their encoded bytes
+        # (an uncached snapshot's version is never seen again, so its bodies are not kept)
+        cache_key = None
+        if not page and pagination == "offset" and format in CACHED_FORMATS and sheets_service.snapshots.holds(snapshot):
+            cache_key = (endpoint_id, snapshot.version, etag)
+            cached = sheets_service.responses.get(cache_key)
+            if cached:
+                return await _cached_response(cache_key, cached, request)
+        
+        if not page and not cursor_state:
+            positions = table.positions()
+            
+            # 3. Apply search, filtering, sorting and pagination on row positions
+            if search:
+                # Ranked matches from the snapshot's inverted index
+                positions = sheets_service.search_snapshot(snapshot, search)
             
-            # Find the actual column name (case-insensitive)
-            actual_column = None
-            if sheet_data:
-                available_columns = list(sheet_data[0].keys())
-                print(f"Debug: Looking for column '{sort_by}' in available columns: {available_columns}")
+            if row_filter:
+                try:
+                    # Evaluated on the snapshot's cached column indexes
+                    matched = row_filter.select(table)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+                if search:
+                    # Keep the search ranking, restricted to the rows that passed the filter
+                    matched = set(matched)
+                    positions = [position for position in positions if position in matched]
+                else:
+                    positions = matched
+            
+            if sort_by and table.num_rows:
+                # Improved sorting with case-insensitive column matching and better handling of missing values
+                reverse = sort_order == "desc"
                 
-                for col in available_columns:
-                    if col.lower() == sort_by.lower():
-                        actual_column = col
-                        print(f"Debug: Found matching column '{col}' for '{sort_by}'")
-                        break
+                # Find the actual column name (case-insensitive)
+                actual_column = table.find_column(sort_by)
                 
-                if not actual_column:
-                    print(f"Debug: No exact match found for '{sort_by}'. Available columns: {available_columns}")
+                if actual_column:
+                    # Typed permutation (numbers, then text, empty values last) cached on the snapshot
+                    permutation = table.sort_permutation(actual_column, descending=reverse)
+                    if row_filter or search:
+                        # Keep the sorted order, restricted to the rows that were selected
+                        selected = set(positions)
+                        positions = [position for position in permutation if position in selected]
+                    else:
+                        positions = permutation
+                else:
+                    # If column not found, return error or ignore sorting
+                    print(f"Warning: Column '{sort_by}' not found in data. Available columns: {table.headers}")
             
-            if actual_column:
-                # Sort with proper handling of missing values and data types
-                def sort_key(item):
-                    value = item.get(actual_column, "")
-                    # Handle numeric values
-                    if isinstance(value, str) and value.replace('.', '').replace('-', '').isdigit():
-                        return float(value) if '.' in value else int(value)
-                    # Handle empty/missing values
-                    if value == "" or value is None:
-                        return "" if not reverse else "zzzzzzzzzz"  # Put empty values at end for desc
-                    return str(value).lower()  # Case-insensitive string comparison
-                
-                sheet_data = sorted(sheet_data, key=sort_key, reverse=reverse)
-            else:
-                # If column not found, return error or ignore sorting
-                print(f"Warning: Column '{sort_by}' not found in data. Available columns: {list(sheet_data[0].keys()) if sheet_data else []}")
+            if pagination == "cursor":
+                sheets_service.cursor_pins.pin(snapshot, ordering, positions)
         
-        # Apply pagination
-        total_count = len(sheet_data)
-        sheet_data = sheet_data[offset:offset + limit]
+        next_cursor = None
+        if not page:
+            # Apply pagination on positions only; row dicts are built for the returned page
+            total_count = len(positions)
+            end = total_count if limit is None else offset + limit
+            has_more = end < total_count
+            page_positions = positions[offset:end]
+            if pagination == "cursor" and has_more:
+                next_cursor = encode_cursor({
+                    "e": endpoint_id,
+                    "v": snapshot.version,
+                    "s": [sort_by, sort_order, filter_expr, search],
+                    "o": end
+                }, settings.JWT_SECRET_KEY)
+        
+        # Bulk formats are built straight from the table's columns, without row dicts
+        pagination_headers = {"X-Has-More": str(has_more).lower(), "ETag": etag}
+        if total_count is not None:
+            pagination_headers["X-Total-Count"] = str(total_count)
+        if next_cursor:
+            pagination_headers["X-Next-Cursor"] = next_cursor
+        if format == "csv":
+            return StreamingResponse(iter_csv(table, page_positions), media_type=STREAM_MEDIA_TYPES[format], headers=pagination_headers)
+        if format in STREAM_MEDIA_TYPES:
+            # Rows are serialized straight from the table as the client reads them
+            return StreamingResponse(
+                _stream_rows(table, page_positions, format),
+                media_type=STREAM_MEDIA_TYPES[format],
+                headers=pagination_headers
+            )
+        if format == "columnar":
+            columnar = to_columnar(table, page_positions)
+            columnar["pagination"] = {"total": total_count, "limit": limit, "offset": offset, "has_more": has_more}
+            if pagination == "cursor":
+                columnar["pagination"]["next_cursor"] = next_cursor
+            return await _encoded_response(cache_key, _encode_json(columnar), "application/json", pagination_headers, request)
+        if format == "arrow":
+            try:
+                content = to_arrow_ipc(table, page_positions)
+            except RuntimeError as e:
+                raise HTTPException(status_code=501, detail=str(e))
+            return await _encoded_response(cache_key, content, ARROW_MEDIA_TYPE, pagination_headers, request)
+        sheet_data = table.records(page_positions)
         
         # 4. Return JSON response
         response = {
@@ -85,7 +242,7 @@ async def get_dynamic_data(
                 "total": total_count,
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + limit < total_count
+                "has_more": has_more
             },
             "endpoint_info": {
                 "name": api_endpoint.name,
@@ -93,42 +250,203 @@ async def get_dynamic_data(
                 "created_at": api_endpoint.created_at
             }
         }
+        if pagination == "cursor":
+            response["pagination"]["next_cursor"] = next_cursor
+            response["pagination"]["snapshot_version"] = snapshot.version
         
         # Add debug information if requested
         if debug and sheet_data:
             response["debug"] = {
-                "available_columns": list(sheet_data[0].keys()) if sheet_data else [],
+                "available_columns": table.headers,
+                "page_pushdown": page is not None,
                 "sort_by_requested": sort_by,
                 "sort_order_requested": sort_order,
                 "total_rows": len(sheet_data),
                 "sample_data": sheet_data[:2] if len(sheet_data) >= 2 else sheet_data
             }
         
-        return response
+        return await _encoded_response(cache_key, _encode_json(response), "application/json", pagination_headers, request)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
 
+def _encode_json(content: Any) -> bytes:
+    """Encode like FastAPI's JSONResponse (datetimes as ISO 8601)"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=lambda value: value.isoformat() if hasattr(value, "isoformat") else str(value)
+    ).encode("utf-8")
+
+async def _encoded_response(cache_key, body: bytes, media_type: str, headers: Dict[str, str], request: Request) -> Response:
+    """Serve freshly encoded bytes, keeping them in the response cache when the query is cacheable"""
+    entry = CachedResponse(body, media_type, headers)
+    if cache_key is not None:
+        sheets_service.responses.put(cache_key, entry)
+    return await _cached_response(cache_key, entry, request)
+
+async def _cached_response(cache_key, entry: CachedResponse, request: Request) -> Response:
+    headers = {**entry.headers, "Vary": "Accept-Encoding"}
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        compressed = await entry.compressed()
+        if compressed is not None:
+            if cache_key is not None:
+                sheets_service.responses.resized(cache_key)
+            headers["Content-Encoding"] = "gzip"
+            if "ETag" in headers:
+                # Strong validators must differ between content codings
+                headers["ETag"] = _gzip_etag(headers["ETag"])
+            return Response(content=compressed, media_type=entry.media_type, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether Accept-Encoding allows gzip, honouring q-values (gzip;q=0 refuses it)"""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ("gzip", "x-gzip"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return qualities.get("*", 0.0) > 0
+
+def _etag(content_hash: str, *parts) -> str:
+    """Strong ETag from the data's content hash plus whatever else shapes the response"""
+    digest = hashlib.sha256(json.dumps([content_hash, *parts], default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _gzip_etag(etag: str) -> str:
+    return etag[:-1] + '-gz"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The tag (identity or gzip variant of etag) that If-None-Match matches, or None"""
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    for candidate in (etag, _gzip_etag(etag)):
+        if candidate in tags:
+            return candidate
+    return None
+
+def _stream_rows(table, positions, format: str):
+    """Yield the rows at positions as NDJSON lines or as one JSON array, a chunk at a time"""
+    if format == "json_stream":
+        yield "["
+    for start in range(0, len(positions), STREAM_CHUNK_ROWS):
+        rows = [json.dumps(record, default=str) for record in table.records(positions[start:start + STREAM_CHUNK_ROWS])]
+        if format == "ndjson":
+            yield "\n".join(rows) + "\n"
+        else:
+            yield ("," if start else "") + ",".join(rows)
+    if format == "json_stream":
+        yield "]"
+
+@router.get("/data/{endpoint_id}/aggregate")
+async def aggregate_dynamic_data(
+    endpoint_id: str,
+    metrics: str = Query("count", description="Comma-separated aggregates: count, count:col, sum:col, avg:col, min:col, max:col"),
+    group_by: Optional[str] = Query(None, description="Comma-separated columns to group by"),
+    filter_expr: Optional[str] = Query(None, alias="filter", description="Row filter applied before aggregating (same syntax as GET /data)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Grouped count/sum/avg/min/max computed over the cached snapshot"""
+    try:
+        group_columns = [name.strip() for name in (group_by or "").split(",") if name.strip()]
+        parsed_metrics = parse_metrics(metrics)
+        row_filter = RowFilter.parse(filter_expr) if filter_expr else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
+        
+        # 2. Get the (cached) snapshot; results are memoized on this exact version
+        snapshot = await sheets_service.get_snapshot(
+            api_endpoint.sheet_id,
+            api_endpoint.sheet_range,
+            api_endpoint.cache_ttl_seconds
+        )
+        memo_key = (tuple(group_columns), tuple(parsed_metrics), filter_expr or "")
+        result = snapshot.aggregates.get(memo_key)
+        
+        # 3. Filter, then group and reduce
+        if result is None:
+            table = snapshot.table
+            try:
+                positions = row_filter.select(table) if row_filter else table.positions()
+                result = aggregate(table, positions, group_columns, parsed_metrics)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            result["rows"] = len(positions)
+            snapshot.memoize_aggregate(memo_key, result, MAX_MEMOIZED_AGGREGATES)
+        
+        return {
+            **result,
+            "snapshot_version": snapshot.version,
+            "endpoint_id": endpoint_id
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error aggregating data: {str(e)}")
+
 @router.post("/data/{endpoint_id}")
 async def create_dynamic_row(
     endpoint_id: str,
     row_data: Dict[str, Any],
     position: Optional[str] = Query("end", description="Insert position: 'beg', 'end', or row index number"),
-    db: Session = Depends(get_db),
+    wait: Optional[bool] = Query(True, description="For write-behind endpoints: wait for the batched append instead of returning 202"),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Add a new row to the Google Sheet"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 2. Write-behind endpoints queue appends and flush them in batches
+        if api_endpoint.write_behind and position == "end":
+            pending = sheets_service.enqueue_append(
+                api_endpoint.sheet_id,
+                api_endpoint.sheet_range,
+                row_data
+            )
+            if not wait:
+                return JSONResponse(status_code=202, content={
+                    "message": "Row queued for write",
+                    "endpoint_id": endpoint_id,
+                    "data": row_data
+                })
+            
+            return {
+                "message": "Row created successfully",
+                "endpoint_id": endpoint_id,
+                "data": row_data,
+                "result": await pending
+            }
         
-        # 2. Add row to Google Sheet at specified position
+        # 3. Add row to Google Sheet at specified position
         result = await sheets_service.add_row_at_position(
             api_endpoint.sheet_id,
             api_endpoint.sheet_range,
@@ -146,24 +464,109 @@ async def create_dynamic_row(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating row: {str(e)}")
 
+@router.post("/data/{endpoint_id}/bulk")
+async def create_dynamic_rows_bulk(
+    endpoint_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Add many rows from a JSON array or NDJSON body in chunked appends"""
+    try:
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
+        
+        # 2. Parse the body: a JSON array of objects, or one JSON object per line
+        raw_body = await request.body()
+        try:
+            body = raw_body.decode("utf-8")
+            if "ndjson" in request.headers.get("content-type", "") or not body.lstrip().startswith("["):
+                rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+            else:
+                rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        
+        if not rows or not all(isinstance(row, dict) for row in rows):
+            raise HTTPException(status_code=400, detail="Body must contain at least one row object")
+        
+        # 3. Append all rows in chunks
+        result = await sheets_service.bulk_append_rows(
+            api_endpoint.sheet_id,
+            api_endpoint.sheet_range,
+            rows
+        )
+        
+        if result["inserted_rows"] == 0:
+            raise HTTPException(status_code=500, detail=f"Error creating rows: {result['chunks'][0]['error']}")
+        
+        response = {
+            "message": result["message"],
+            "endpoint_id": endpoint_id,
+            "result": result
+        }
+        # 207 tells the client some chunks failed and it should resume from next_row
+        return response if result["complete"] else JSONResponse(status_code=207, content=response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating rows: {str(e)}")
+
+@router.post("/data/{endpoint_id}/batch")
+async def apply_dynamic_batch(
+    endpoint_id: str,
+    operations: List[BatchOperation],
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Apply mixed inserts, updates and deletes in one batchUpdate
+
+    Row indices, positions and criteria all refer to the sheet as it was before the batch.
+    """
+    try:
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
+        
+        if not operations:
+            raise HTTPException(status_code=400, detail="At least one operation must be provided")
+        for i, operation in enumerate(operations):
+            if operation.op not in ("insert", "update", "delete"):
+                raise HTTPException(status_code=400, detail=f"Operation {i}: op must be 'insert', 'update' or 'delete'")
+        
+        # 2. Compile and apply the batch
+        try:
+            result = await sheets_service.apply_batch(
+                api_endpoint.sheet_id,
+                api_endpoint.sheet_range,
+                [operation.model_dump() for operation in operations]
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "message": result["message"],
+            "endpoint_id": endpoint_id,
+            "result": result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying batch: {str(e)}")
+
 @router.put("/data/{endpoint_id}/{row_id}")
 async def update_dynamic_row(
     endpoint_id: str,
     row_id: str,
     row_data: Dict[str, Any],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Update a row in the Google Sheet"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
         # 2. Convert row_id to integer (assuming it's the row index)
         try:
@@ -194,19 +597,13 @@ async def update_dynamic_row(
 async def delete_dynamic_row(
     endpoint_id: str,
     row_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Delete a row from the Google Sheet"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
         # 2. Convert row_id to integer (assuming it's the row index)
         try:
@@ -234,19 +631,13 @@ async def delete_dynamic_row(
 @router.get("/data/{endpoint_id}/debug")
 async def debug_endpoint(
     endpoint_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Debug endpoint to check permissions and service account info"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
         # 2. Check permissions
         permissions = await sheets_service.check_sheet_permissions(api_endpoint.sheet_id)
@@ -281,7 +672,9 @@ async def debug_endpoint(
                 "sheet_range": api_endpoint.sheet_range
             },
             "permissions": permissions,
-            "setup_instructions": setup_instructions
+            "setup_instructions": setup_instructions,
+            # Concurrent identical reads merged into one Sheets API call since startup
+            "upstream_reads": sheets_service.reads.stats()
         }
         
     except Exception as e:
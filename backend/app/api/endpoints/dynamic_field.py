@@ -1,31 +1,23 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import Dict, Any
-from app.services.google_sheets import GoogleSheetsService
-from app.models.api_endpoint import APIEndpoint
-from sqlalchemy.orm import Session
+from app.services.google_sheets import sheets_service
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_api_endpoint, get_current_user
 
 router = APIRouter()
-sheets_service = GoogleSheetsService()
 
 @router.put("/data/{endpoint_id}/field/update")
 async def update_dynamic_rows_by_field(
     endpoint_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Update rows in the Google Sheet that match field criteria (SheetDB.io approach)"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
         # 2. Get the request body (row_data)
         try:
@@ -69,19 +61,13 @@ async def update_dynamic_rows_by_field(
 async def delete_dynamic_rows_by_field(
     endpoint_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Delete rows from the Google Sheet that match field criteria (SheetDB.io approach)"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
         # 2. Convert query parameters to field criteria dict
         criteria_dict = {}
@@ -117,19 +103,13 @@ async def insert_dynamic_row_by_field(
     endpoint_id: str,
     row_data: Dict[str, Any],
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Insert a new row after rows that match field criteria (SheetDB.io approach)"""
     try:
-        # 1. Look up the endpoint and verify ownership
-        api_endpoint = db.query(APIEndpoint).filter(
-            APIEndpoint.endpoint_path == f"/api/v1/data/{endpoint_id}",
-            APIEndpoint.user_id == current_user
-        ).first()
-        
-        if not api_endpoint:
-            raise HTTPException(status_code=404, detail="API endpoint not found")
+        # 1. Look up the endpoint and verify ownership (cached)
+        api_endpoint = await get_api_endpoint(db, endpoint_id, current_user)
         
         # 2. Get the request body (row_data)
         try:
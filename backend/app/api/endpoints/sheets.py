@@ -1,17 +1,18 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
-from app.services.google_sheets import GoogleSheetsService
+from app.services.google_sheets import GoogleSheetsService, sheets_service
+from app.services.endpoint_cache import endpoint_cache
 from app.services.sheet_template import SheetValidator, SheetTemplate, SheetType
 from app.models.api_endpoint import APIEndpoint
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.api.deps import get_current_user
 
 router = APIRouter()
-sheets_service = GoogleSheetsService()
 validator = SheetValidator()
 
 # Helper functions (moved to top)
@@ -29,6 +30,8 @@ class SheetCreate(BaseModel):
     sheet_url: str
     name: str
     sheet_range: str = "A1:Z1000"  # Default range
+    cache_ttl_seconds: Optional[int] = Field(None, ge=0)  # Snapshot cache TTL, None for the server default
+    write_behind: bool = False  # Coalesce appends into batched writes
 
 class SheetResponse(BaseModel):
     id: int
@@ -62,18 +65,15 @@ async def read_sheet(
     range: str = None
 ):
     try:
-        sheet = sheets_service.service.spreadsheets()
+        client = sheets_service.client
         
         # If no range specified, read all data
         if not range:
-            metadata = sheet.get(spreadsheetId=sheet_id).execute()
+            metadata = await client.get_spreadsheet(sheet_id)
             sheet_name = metadata['sheets'][0]['properties']['title']
             range = f"{sheet_name}"
             
-        result = sheet.values().get(
-            spreadsheetId=sheet_id,
-            range=range
-        ).execute()
+        result = await client.values_get(sheet_id, range)
         
         values = result.get('values', [])
         
@@ -134,7 +134,7 @@ async def validate_sheet(
 @router.post("/sheets", response_model=SheetResponse)
 async def create_sheet_api(
     sheet: SheetCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     # Extract sheet ID from URL
@@ -153,12 +153,16 @@ async def create_sheet_api(
         name=sheet.name,
         sheet_id=sheet_id,
         sheet_range=sheet.sheet_range,
+        cache_ttl_seconds=sheet.cache_ttl_seconds,
+        write_behind=sheet.write_behind,
         endpoint_path=endpoint_path
     )
     
     db.add(db_endpoint)
-    db.commit()
-    db.refresh(db_endpoint)
+    await db.commit()
+    await db.refresh(db_endpoint)
+    # Drop any cached 404 for this id so the new endpoint is visible immediately
+    endpoint_cache.invalidate(endpoint_id)
 
     return SheetResponse(
         id=db_endpoint.id,
@@ -170,15 +174,16 @@ async def create_sheet_api(
 
 @router.get("/sheets", response_model=List[SheetResponse])
 async def get_sheets(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Get all API endpoints for the current user"""
     try:
         # Filter sheets by current user
-        sheets = db.query(APIEndpoint).filter(
+        result = await db.execute(select(APIEndpoint).where(
             APIEndpoint.user_id == current_user
-        ).all()
+        ))
+        sheets = result.scalars().all()
         
         return [
             SheetResponse(
@@ -15,6 +15,12 @@ class Settings(BaseSettings):
     # Clerk Configuration
     CLERK_SECRET_KEY: str = os.environ.get("CLERK_SECRET_KEY", "")
     CLERK_PUBLISHABLE_KEY: str = os.environ.get("CLERK_PUBLISHABLE_KEY", "")
+    CLERK_JWKS_URL: str = os.environ.get("CLERK_JWKS_URL", "https://api.clerk.com/v1/jwks")
+    CLERK_ISSUER: Optional[str] = os.environ.get("CLERK_ISSUER")  # Checked against the iss claim when set
+    CLERK_JWKS_REFRESH_SECONDS: int = 3600  # Older keys are refreshed in the background
+    CLERK_JWKS_MIN_REFETCH_SECONDS: int = 30  # Tokens with an unknown kid refetch at most this often
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Verified tokens whose claims are reused until exp
+    AUTH_ALLOW_UNVERIFIED_TOKENS: bool = False  # Development only: skip signature verification
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -24,9 +30,52 @@ class Settings(BaseSettings):
     
     # Google OAuth
     GOOGLE_CREDENTIALS: str = os.environ["GOOGLE_CREDENTIALS"]  # JSON string from service account key
-    
+
+    # Google Sheets HTTP client
+    SHEETS_MAX_CONNECTIONS: int = 20
+    SHEETS_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SHEETS_TIMEOUT_SECONDS: float = 30.0
+    SHEETS_MAX_PAYLOAD_BYTES: int = 2 * 1024 * 1024  # Split batch writes above Google's recommended request size
+
+    # Sheet snapshot cache (per-endpoint TTL overrides the default)
+    SNAPSHOT_CACHE_TTL_SECONDS: int = 30
+    SNAPSHOT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    SNAPSHOT_WRITE_MAX_AGE_SECONDS: int = 5  # Oldest snapshot field-based writes may match against
+    PAGE_PUSHDOWN_MIN_ROWS: int = 5000  # ?pushdown=true reads of larger uncached grids fetch only the requested page
+    SEARCH_INDEX_MAX_BYTES: int = 128 * 1024 * 1024  # Full-text indexes kept between snapshots (LRU by range)
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Encoded GET responses, keyed by snapshot version and query
+
+    # Cursor pagination (snapshots pinned for later pages)
+    CURSOR_RETENTION_SECONDS: int = 300  # Idle time before a pinned snapshot expires (410 Gone)
+    CURSOR_PINS_MAX_BYTES: int = 128 * 1024 * 1024
+
+    # Header row cache shared by every write path
+    HEADER_CACHE_TTL_SECONDS: int = 30  # Columns added or reordered outside the app are seen within this
+    HEADER_CACHE_RECHECK_SECONDS: int = 5  # Min age before unknown fields trigger a header refetch
+
+    # Tab metadata (sheetIds and grid sizes); unknown tab names always refetch
+    METADATA_CACHE_TTL_SECONDS: int = 600
+
+    # Endpoint ownership lookups (misses cached briefly so repeated 404s skip the database)
+    ENDPOINT_CACHE_TTL_SECONDS: int = 60
+    ENDPOINT_CACHE_NEGATIVE_TTL_SECONDS: int = 10
+    ENDPOINT_CACHE_MAX_ENTRIES: int = 10000
+
+    # Write-behind appends (endpoints with write_behind enabled)
+    WRITE_BEHIND_MAX_ROWS: int = 500  # Flush as soon as this many rows are queued
+    WRITE_BEHIND_MAX_DELAY_SECONDS: float = 1.0  # ...or this long after the first queued row
+
+    # Bulk inserts
+    BULK_APPEND_MAX_ROWS_PER_CHUNK: int = 5000
+
     # Database
-    DATABASE_URL: str = os.environ["DATABASE_URL"]
+    DATABASE_URL: str = os.environ["DATABASE_URL"]  # postgresql:// URLs are served through asyncpg
+    DATABASE_POOL_SIZE: int = 20
+    DATABASE_MAX_OVERFLOW: int = 10  # Extra connections allowed beyond the pool under bursts
+    DATABASE_POOL_TIMEOUT_SECONDS: int = 30
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True  # Detect connections dropped by the server before use
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection; 0 behind pgbouncer
 
     @property
     def google_credentials_dict(self) -> dict:
@@ -1,6 +1,25 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, text
 from app.db.base_class import Base
 from app.db.session import engine
 
-def init_db() -> None:
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+# Columns added after tables were first created; create_all never alters existing tables
+ADDED_COLUMNS = {
+    "api_endpoints": {
+        "cache_ttl_seconds": "INTEGER",  # snapshot cache TTL override
+        "write_behind": "BOOLEAN DEFAULT FALSE",  # buffered POST appends
+    },
+}
+
+def _add_missing_columns(conn) -> None:
+    inspector = inspect(conn)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for name, ddl in columns.items():
+            if name not in existing:
+                print(f"Adding column {table}.{name}")
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+async def init_db() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
@@ -1,13 +1,40 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
+def _async_database_url(url: str):
+    """Point plain postgres/sqlite URLs at their async drivers (asyncpg / aiosqlite)"""
+    for prefix, driver in (("postgres://", "postgresql+asyncpg://"), ("postgresql://", "postgresql+asyncpg://"),
+                           ("postgresql+psycopg2://", "postgresql+asyncpg://"), ("sqlite://", "sqlite+aiosqlite://")):
+        if url.startswith(prefix):
+            url = driver + url[len(prefix):]
+            break
+    return make_url(url)
+
+
+def _create_engine():
+    url = _async_database_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "sqlite":
+        # sqlite has no QueuePool sizing; let SQLAlchemy pick its default pool
+        return create_async_engine(url)
+    if url.get_driver_name() == "asyncpg":
+        # Prepared statements cached per connection; 0 disables them (pgbouncer transaction pooling)
+        url = url.update_query_dict({"prepared_statement_cache_size": str(settings.DATABASE_STATEMENT_CACHE_SIZE)})
+    return create_async_engine(
+        url,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING
+    )
+
+
+engine = _create_engine()
+# expire_on_commit=False: attributes stay loaded after commit instead of lazy-loading outside the session
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
@@ -12,5 +12,7 @@ class APIEndpoint(Base):
     sheet_range = Column(String)
     endpoint_path = Column(String, unique=True)
     access_token = Column(String)
+    cache_ttl_seconds = Column(Integer, nullable=True)  # None uses SNAPSHOT_CACHE_TTL_SECONDS, 0 disables caching
+    write_behind = Column(Boolean, default=False)  # Buffer POST appends and flush them in batches
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
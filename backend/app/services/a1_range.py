@@ -0,0 +1,85 @@
+import re
+from typing import Optional
+
+# Column letters are capped at 3 (ZZZ) so tab names like 'Sheet1' are not read as cells
+A1_PATTERN = re.compile(r"^([A-Za-z]{0,3})(\d*)(?::([A-Za-z]{0,3})(\d*))?$")
+# Without a '!', Google reads letters-only ranges ('Jan', 'Foo') as tab names, so cells need a row or ':'
+CELL_MARKER = re.compile(r"[\d:]")
+
+
+def column_letter(index: int) -> str:
+    """0-based column index -> A1 column letters (0 -> A, 26 -> AA)"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """A1 column letters -> 0-based column index"""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + (ord(letter) - 64)
+    return index - 1
+
+
+class A1Range:
+    """Parsed A1 range such as 'A1:Z1000' or "'My Tab'!B2:F" (rows are 1-based)"""
+
+    def __init__(self, tab: Optional[str], start_col: int, start_row: int, end_col: Optional[int], end_row: Optional[int]):
+        self.tab = tab
+        self.start_col = start_col
+        self.start_row = start_row
+        self.end_col = end_col
+        self.end_row = end_row
+
+    @classmethod
+    def parse(cls, range_name: str) -> "A1Range":
+        tab = None
+        cells = range_name
+        if "!" in range_name:
+            tab, cells = range_name.rsplit("!", 1)
+            if tab.startswith("'") and tab.endswith("'"):
+                tab = tab[1:-1].replace("''", "'")
+        elif range_name and (not CELL_MARKER.search(range_name) or not A1_PATTERN.match(range_name.replace("$", ""))):
+            # A bare tab name covers the whole tab
+            return cls(range_name, 0, 1, None, None)
+
+        match = A1_PATTERN.match(cells.replace("$", ""))
+        if not match:
+            raise ValueError(f"Invalid A1 range '{range_name}'")
+        start_letters, start_row, end_letters, end_row = match.groups()
+
+        start_col = column_index(start_letters) if start_letters else 0
+        if cells and ":" not in cells:
+            # Single cell or column
+            end_col = start_col if start_letters else None
+            end_row_number = int(start_row) if start_row else None
+        else:
+            end_col = column_index(end_letters) if end_letters else None
+            end_row_number = int(end_row) if end_row else None
+        return cls(tab, start_col, int(start_row) if start_row else 1, end_col, end_row_number)
+
+    @property
+    def prefix(self) -> str:
+        """Quoted 'Tab'! prefix, or '' for the first tab"""
+        if self.tab is None:
+            return ""
+        return "'" + self.tab.replace("'", "''") + "'!"
+
+    def rows(self, first_row: int, last_row: int) -> str:
+        """A1 range covering whole sheet rows first_row..last_row within this range's columns"""
+        if self.end_col is None:
+            # Open-ended columns (e.g. a bare tab name): use whole rows
+            return f"{self.prefix}{first_row}:{last_row}"
+        return f"{self.prefix}{column_letter(self.start_col)}{first_row}:{column_letter(self.end_col)}{last_row}"
+
+    def data_row(self, row_index: int) -> int:
+        """1-based sheet row of 0-based data row row_index (the row after the headers is 0)"""
+        return self.start_row + 1 + row_index
+
+    def header_range(self) -> str:
+        """The first row of the range, which holds the headers"""
+        return self.rows(self.start_row, self.start_row)
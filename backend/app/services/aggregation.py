@@ -0,0 +1,105 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.services.sheet_table import SheetTable, typed_sort_key
+
+AGGREGATE_FUNCTIONS = {"count", "sum", "avg", "min", "max"}
+
+# Distinct queries memoized per snapshot before the memo is reset
+MAX_MEMOIZED_AGGREGATES = 128
+
+Metric = Tuple[str, Optional[str]]  # (function, column); column is None only for count
+
+
+def parse_metrics(text: str) -> List[Metric]:
+    """Parse 'count,sum:amount,avg:amount' into (function, column) pairs"""
+    metrics = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        function, _, column = part.partition(":")
+        function = function.strip().lower()
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unknown aggregate '{function}'. Use one of: {', '.join(sorted(AGGREGATE_FUNCTIONS))}")
+        column = column.strip() or None
+        if column is None and function != "count":
+            raise ValueError(f"'{function}' needs a column, e.g. {function}:amount")
+        metrics.append((function, column))
+    if not metrics:
+        raise ValueError("At least one metric is required")
+    return metrics
+
+
+def metric_name(metric: Metric) -> str:
+    function, column = metric
+    return function if column is None else f"{function}({column})"
+
+
+def aggregate(table: SheetTable, positions: Sequence[int], group_by: List[str], metrics: List[Metric]) -> Dict[str, Any]:
+    """Grouped aggregates over the rows at positions, groups in typed key order
+
+    Column names are resolved case-insensitively; the result echoes the
+    resolved group_by columns and metric names used as keys in each group.
+
+    count counts rows (count:column counts non-empty cells); sum/avg/min/max
+    use the numeric cells of a column and skip text and empty cells.
+    """
+    group_columns = [_resolve(table, name) for name in group_by]
+    metrics = [(function, _resolve(table, column) if column else None) for function, column in metrics]
+
+    # 1. Bucket row positions by group key (a single bucket without group_by)
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    if not group_columns:
+        groups[()] = list(positions)
+    elif len(group_columns) == 1:
+        # One group column: its hash index already is the bucketing
+        selected = positions if isinstance(positions, range) else set(positions)
+        for value, postings in table.value_index(group_columns[0]).items():
+            bucket = [position for position in postings if position in selected]
+            if bucket:
+                groups[(value,)] = bucket
+    else:
+        cells = [table.column(name) for name in group_columns]
+        for position in positions:
+            groups.setdefault(tuple(column[position] or "" for column in cells), []).append(position)
+
+    # 2. Reduce each bucket over the cached numeric columns
+    numeric = {column: table.numeric_column(column) for function, column in metrics if column and function != "count"}
+    results = []
+    for key in sorted(groups, key=lambda key: [typed_sort_key(value) for value in key]):
+        bucket = groups[key]
+        row = dict(zip(group_columns, key))
+        for metric in metrics:
+            row[metric_name(metric)] = _reduce(table, bucket, metric, numeric)
+        results.append(row)
+    return {
+        "groups": results,
+        "group_by": group_columns,
+        "metrics": [metric_name(metric) for metric in metrics]
+    }
+
+
+def _resolve(table: SheetTable, name: str) -> str:
+    column = table.find_column(name)
+    if column is None:
+        raise ValueError(f"Unknown column '{name}'. Available columns: {table.headers}")
+    return column
+
+
+def _reduce(table: SheetTable, bucket: List[int], metric: Metric, numeric: Dict[str, Any]) -> Any:
+    function, column = metric
+    if function == "count":
+        if column is None:
+            return len(bucket)
+        cells = table.column(column)
+        return sum(1 for position in bucket if cells[position])
+
+    numbers = numeric[column]
+    values = [numbers[position] for position in bucket if not math.isnan(numbers[position])]
+    if not values:
+        return None
+    if function == "sum":
+        return math.fsum(values)
+    if function == "avg":
+        return math.fsum(values) / len(values)
+    return min(values) if function == "min" else max(values)
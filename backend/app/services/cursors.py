@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+from app.services.snapshot_cache import SheetSnapshot
+
+# Bytes of the HMAC-SHA256 kept in the cursor (128 bits is plenty for tamper detection)
+SIGNATURE_BYTES = 16
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def query_key(*parts: Any) -> str:
+    """Short fingerprint of the query parameters that decide row order"""
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(state: Dict[str, Any], secret: str) -> str:
+    """Opaque signed token: base64url(json state) + '.' + base64url(hmac)"""
+    payload = _b64encode(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+    signature = hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return f"{payload}.{_b64encode(signature)}"
+
+
+def decode_cursor(token: str, secret: str) -> Dict[str, Any]:
+    """Verify and decode a cursor; raises ValueError if it is malformed or was tampered with"""
+    try:
+        payload, signature = token.split(".")
+        expected = hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            raise ValueError("bad signature")
+        return json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+class CursorPins:
+    """Snapshots kept alive for cursor pagination, with the row order of each query over them
+
+    A pin lives for `retention` seconds after its last use, so an active walk
+    keeps its snapshot while abandoned ones expire. Pins beyond max_bytes are
+    evicted least recently used first.
+    """
+
+    def __init__(self, retention: float, max_bytes: int):
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # version -> (snapshot, {query key: ordered positions}, expires_at)
+        self._pins: "OrderedDict[int, Tuple[SheetSnapshot, Dict[str, Sequence[int]], float]]" = OrderedDict()
+        # Snapshot bytes counted into total_bytes per pin (indexes may grow it later)
+        self._snapshot_bytes: Dict[int, int] = {}
+
+    def pin(self, snapshot: SheetSnapshot, key: str, positions: Sequence[int]) -> None:
+        self._expire()
+        entry = self._pins.get(snapshot.version)
+        if entry is None:
+            entry = (snapshot, {}, 0.0)
+            self._snapshot_bytes[snapshot.version] = snapshot.size_bytes
+            self.total_bytes += snapshot.size_bytes
+        orders = entry[1]
+        if key not in orders:
+            orders[key] = positions
+            self.total_bytes += 8 * len(positions)
+        self._pins[snapshot.version] = (snapshot, orders, time.monotonic() + self.retention)
+        self._pins.move_to_end(snapshot.version)
+
+        while self.total_bytes > self.max_bytes and len(self._pins) > 1:
+            self._remove(next(iter(self._pins)))
+
+    def get(self, version: int, key: str) -> Optional[Tuple[SheetSnapshot, Sequence[int]]]:
+        """The pinned snapshot and row order, or None once the pin has expired"""
+        self._expire()
+        entry = self._pins.get(version)
+        if entry is None or key not in entry[1]:
+            return None
+        snapshot, orders, _ = entry
+        self._pins[version] = (snapshot, orders, time.monotonic() + self.retention)
+        self._pins.move_to_end(version)
+        return snapshot, orders[key]
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for version in [version for version, entry in self._pins.items() if entry[2] < now]:
+            self._remove(version)
+
+    def _remove(self, version: int) -> None:
+        snapshot, orders, _ = self._pins.pop(version)
+        self.total_bytes -= self._snapshot_bytes.pop(version) + sum(8 * len(positions) for positions in orders.values())
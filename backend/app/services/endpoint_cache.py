@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.models.api_endpoint import APIEndpoint
+
+
+class ResolvedEndpoint:
+    """Plain copy of an APIEndpoint row, safe to share across requests and sessions"""
+
+    def __init__(self, endpoint: APIEndpoint):
+        self.id = endpoint.id
+        self.user_id = endpoint.user_id
+        self.name = endpoint.name
+        self.sheet_id = endpoint.sheet_id
+        self.sheet_range = endpoint.sheet_range
+        self.endpoint_path = endpoint.endpoint_path
+        self.cache_ttl_seconds = endpoint.cache_ttl_seconds
+        self.write_behind = bool(endpoint.write_behind)
+        self.created_at = endpoint.created_at
+
+
+class EndpointCache:
+    """TTL + LRU cache of endpoint ownership lookups keyed by (endpoint_id, user_id)
+
+    Misses are cached too (for a shorter negative_ttl) so repeated 404s skip
+    the database. Routes that create, change or delete endpoints must call
+    invalidate().
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[ResolvedEndpoint], float]]" = OrderedDict()
+
+    def get(self, endpoint_id: str, user_id: str) -> Tuple[bool, Optional[ResolvedEndpoint]]:
+        """(hit, endpoint); a hit with endpoint None is a cached 404"""
+        key = (endpoint_id, user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        endpoint, expires_at = entry
+        if time.monotonic() > expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, endpoint
+
+    def put(self, endpoint_id: str, user_id: str, endpoint: Optional[APIEndpoint]) -> Optional[ResolvedEndpoint]:
+        resolved = ResolvedEndpoint(endpoint) if endpoint is not None else None
+        ttl = self.ttl if resolved is not None else self.negative_ttl
+        key = (endpoint_id, user_id)
+        self._entries[key] = (resolved, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return resolved
+
+    def invalidate(self, endpoint_id: str) -> None:
+        """Forget an endpoint for every user (positive and negative entries)"""
+        for key in [key for key in self._entries if key[0] == endpoint_id]:
+            del self._entries[key]
+
+
+endpoint_cache = EndpointCache(
+    settings.ENDPOINT_CACHE_TTL_SECONDS,
+    settings.ENDPOINT_CACHE_NEGATIVE_TTL_SECONDS,
+    settings.ENDPOINT_CACHE_MAX_ENTRIES
+)
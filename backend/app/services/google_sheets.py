@@ -1,14 +1,25 @@
+import asyncio
 import json
 import os
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from typing import List, Dict, Any, Optional
 import re
 from app.core.config import settings
+from app.services.sheets_client import AsyncSheetsClient, ServiceAccountTokenSource
+from app.services.snapshot_cache import SheetPage, SheetSnapshot, SnapshotCache
+from app.services.single_flight import SingleFlight
+from app.services.write_buffer import AppendBuffer
+from app.services.header_cache import HeaderCache
+from app.services.search_index import SearchIndexCache
+from app.services.cursors import CursorPins
+from app.services.response_cache import ResponseCache
+from app.services.sheet_metadata import MetadataCache
+from app.services.a1_range import A1Range
 from app.services.operations.index_based import IndexBasedOperations
 from app.services.operations.field_based import FieldBasedOperations
+from app.services.operations.batch import BatchOperations
 
-class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
+class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations, BatchOperations):
     def __init__(self):
         SCOPES = ['https://www.googleapis.com/auth/spreadsheets']  # Full read/write access
         
@@ -17,35 +28,121 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
             scopes=SCOPES
         )
         
-        self.service = build('sheets', 'v4', credentials=self.credentials)
+        # Pooled keep-alive async client; tokens are signed and refreshed without blocking the loop
+        token_source = ServiceAccountTokenSource(
+            self.credentials,
+            settings.google_credentials_dict["token_uri"],
+            SCOPES
+        )
+        self.client = AsyncSheetsClient(
+            token_source,
+            max_connections=settings.SHEETS_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SHEETS_MAX_KEEPALIVE_CONNECTIONS,
+            timeout=settings.SHEETS_TIMEOUT_SECONDS
+        )
+        
+        # Read-through cache shared by reads and invalidated by every write
+        snapshots = SnapshotCache(settings.SNAPSHOT_CACHE_MAX_BYTES)
+        
+        # Concurrent cache misses for the same range share one upstream fetch
+        reads = SingleFlight()
+        
+        # Header rows for write paths, also filled by every snapshot load
+        headers = HeaderCache(settings.HEADER_CACHE_TTL_SECONDS)
+        
+        # Tab titles -> sheetIds and grid sizes, so inserts and deletes skip a metadata fetch
+        metadata = MetadataCache(settings.METADATA_CACHE_TTL_SECONDS)
         
         # Initialize operation mixins
-        IndexBasedOperations.__init__(self, self.service)
-        FieldBasedOperations.__init__(self, self.service)
+        IndexBasedOperations.__init__(self, self.client, snapshots, reads, headers, metadata)
+        FieldBasedOperations.__init__(self, self.client, snapshots, reads, headers, metadata)
+        BatchOperations.__init__(self, self.client, snapshots, reads, headers, metadata)
+        
+        # Full-text indexes, rebuilt incrementally when a new snapshot arrives
+        self.search_indexes = SearchIndexCache(settings.SEARCH_INDEX_MAX_BYTES)
+        
+        # Snapshots pinned so cursor walks see one consistent version
+        self.cursor_pins = CursorPins(settings.CURSOR_RETENTION_SECONDS, settings.CURSOR_PINS_MAX_BYTES)
+        
+        # Encoded GET responses, so hot queries skip sorting and serialization
+        self.responses = ResponseCache(settings.RESPONSE_CACHE_MAX_BYTES)
+        
+        # Write-behind appends for endpoints that opt in
+        self.append_buffer = AppendBuffer(
+            self.append_rows,
+            max_rows=settings.WRITE_BEHIND_MAX_ROWS,
+            max_delay=settings.WRITE_BEHIND_MAX_DELAY_SECONDS
+        )
     
-    async def get_sheet_data(self, spreadsheet_id: str, range_name: str) -> List[Dict[Any, Any]]:
+    async def aclose(self) -> None:
+        """Flush buffered appends and release pooled HTTP connections"""
+        await self.append_buffer.flush_all()
+        await self.client.aclose()
+    
+    def search_snapshot(self, snapshot: SheetSnapshot, query: str) -> List[int]:
+        """Row positions of the snapshot matching every search term, most relevant first"""
+        return self.search_indexes.get(snapshot).search(query)
+    
+    async def get_sheet_data(self, spreadsheet_id: str, range_name: str, ttl: Optional[int] = None) -> List[Dict[Any, Any]]:
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=spreadsheet_id,
-                range=range_name
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values:
-                return []
+            snapshot = await self.get_snapshot(spreadsheet_id, range_name, ttl)
             
             # Convert to JSON-friendly format
-            headers = values[0]
-            rows = values[1:]
-            
-            return [
-                dict(zip(headers, row))
-                for row in rows
-            ]
+            return snapshot.to_records()
         except Exception as e:
             raise Exception(f"Error fetching sheet data: {str(e)}")
 
+    async def get_page(self, spreadsheet_id: str, range_name: str, offset: int, limit: int, ttl: Optional[int] = None) -> Optional[SheetPage]:
+        """Fetch only rows offset..offset+limit of a large range, or None to read the full snapshot
+        
+        Pushdown is skipped while a snapshot is cached and for grids smaller than
+        PAGE_PUSHDOWN_MIN_ROWS, where one full read is cheap and warms the cache.
+        Windows reaching past the cached grid size refetch it first, since rows
+        appended outside the app may have grown the grid.
+        """
+        if ttl is None:
+            ttl = settings.SNAPSHOT_CACHE_TTL_SECONDS
+        if self.snapshots.get(spreadsheet_id, range_name, ttl):
+            return None
+        
+        rng = A1Range.parse(range_name)
+        tab = await self._get_tab(spreadsheet_id, range_name)
+        if min(rng.data_row(offset + limit), rng.end_row or tab.row_count + 1) > tab.row_count:
+            self.metadata.invalidate(spreadsheet_id)
+            tab = await self._get_tab(spreadsheet_id, range_name)
+        last_row = min(tab.row_count, rng.end_row or tab.row_count)
+        capacity = max(last_row - rng.start_row, 0)  # Data rows the grid can hold
+        if capacity < settings.PAGE_PUSHDOWN_MIN_ROWS:
+            return None
+        
+        header_key = (spreadsheet_id, rng.header_range())
+        headers = self.headers.get(header_key)
+        # Last grid row of the window: the probe row after the page, or the grid's last row
+        window_end_row = min(rng.data_row(offset + limit), last_row)
+        if offset >= capacity:
+            # Past the end of the freshly fetched grid (Sheets rejects ranges beyond it)
+            rows = []
+            window_end_row = last_row
+        else:
+            # Header row (unless cached) and the window, plus one probe row, in one batchGet
+            window = rng.rows(rng.data_row(offset), window_end_row)
+            ranges = [window] if headers is not None else [rng.header_range(), window]
+            generation = self.snapshots.generation(spreadsheet_id)
+            result = await self.reads.do(
+                (spreadsheet_id, tuple(ranges), generation),
+                lambda: self.client.values_batch_get(spreadsheet_id, ranges)
+            )
+            value_ranges = result.get('valueRanges', [])
+            if headers is None:
+                header_values = value_ranges[0].get('values', []) if value_ranges else []
+                headers = header_values[0] if header_values else []
+                self.headers.put(header_key, headers)
+            rows = value_ranges[-1].get('values', []) if value_ranges else []
+        
+        if headers is None:
+            headers = await self._get_headers(spreadsheet_id, range_name)
+        return SheetPage(headers, rows, offset, limit, window_end_row, last_row)
+
     @staticmethod
     def extract_sheet_id(url: str) -> str:
         """Extract the sheet ID from a Google Sheets URL."""
@@ -71,11 +168,10 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
     async def get_raw_data(self, spreadsheet_id: str) -> List[List]:
         """Get raw sheet data as list of lists"""
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=spreadsheet_id,
-                range="A1:Z1000"  # Default range
-            ).execute()
+            result = await self.client.values_get(
+                spreadsheet_id,
+                "A1:Z1000"  # Default range
+            )
             
             return result.get('values', [])
         except Exception as e:
@@ -85,7 +181,7 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
         """Add a new row to the Google Sheet at specified position"""
         try:
             # Get current headers to ensure data alignment
-            headers = await self._get_headers(spreadsheet_id)
+            headers = await self._get_headers(spreadsheet_id, range_name, row_data)
             
             # Prepare row data in the correct order
             row_values = []
@@ -95,14 +191,12 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
             # Determine insert position
             if position == "end":
                 # Add at the end (current behavior)
-                sheet = self.service.spreadsheets()
-                result = sheet.values().append(
-                    spreadsheetId=spreadsheet_id,
-                    range=range_name,
-                    valueInputOption='RAW',
-                    insertDataOption='INSERT_ROWS',
-                    body={'values': [row_values]}
-                ).execute()
+                result = await self.client.values_append(
+                    spreadsheet_id,
+                    range_name,
+                    [row_values]
+                )
+                self.metadata.resize(spreadsheet_id, A1Range.parse(range_name).tab, 1)
                 
                 return {
                     "message": "Row added successfully at end",
@@ -112,39 +206,26 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
                 }
                 
             elif position == "beg":
-                # Insert at beginning (row 2, after headers)
-                sheet = self.service.spreadsheets()
+                # Insert at beginning (first row after headers)
+                rng = A1Range.parse(range_name)
+                actual_row = rng.data_row(0)
                 
-                # Get the sheet ID
-                sheet_metadata = sheet.get(spreadsheetId=spreadsheet_id).execute()
-                sheet_id = sheet_metadata['sheets'][0]['properties']['sheetId']
+                # Get the tab's sheet ID from the metadata cache
+                tab = await self._get_tab(spreadsheet_id, range_name)
                 
-                # First insert a row at position 2
-                result1 = sheet.batchUpdate(
-                    spreadsheetId=spreadsheet_id,
-                    body={
-                        'requests': [
-                            {
-                                'insertDimension': {
-                                    'range': {
-                                        'sheetId': sheet_id,
-                                        'dimension': 'ROWS',
-                                        'startIndex': 1,  # 0-indexed, so row 2
-                                        'endIndex': 2
-                                    }
-                                }
-                            }
-                        ]
-                    }
-                ).execute()
+                # First insert a row right below the headers
+                result1 = await self.client.batch_update(
+                    spreadsheet_id,
+                    [self._dimension_request('insertDimension', tab, actual_row - 1, actual_row)]  # 0-indexed
+                )
+                self.metadata.resize(spreadsheet_id, tab.title, 1)
                 
                 # Then add the data to the new row
-                result2 = sheet.values().update(
-                    spreadsheetId=spreadsheet_id,
-                    range="A2:Z2",  # Insert at row 2, covering all columns
-                    valueInputOption='RAW',
-                    body={'values': [row_values]}
-                ).execute()
+                result2 = await self.client.values_update(
+                    spreadsheet_id,
+                    rng.rows(actual_row, actual_row),  # Covering all columns of the range
+                    [row_values]
+                )
                 
                 return {
                     "message": "Row added successfully at beginning",
@@ -162,45 +243,27 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
                 except ValueError:
                     raise Exception(f"Invalid position '{position}'. Use 'beg', 'end', or a number.")
                 
-                # Calculate actual row (add 1 for header row)
-                actual_row = row_index + 1
-                
-                sheet = self.service.spreadsheets()
+                # Calculate actual row (position 1 is the first row after the headers)
+                rng = A1Range.parse(range_name)
+                actual_row = rng.data_row(row_index - 1)
                 
                 # Use batchUpdate to insert row and add data in one operation
-                # First, we need to get the sheet ID
-                sheet_metadata = sheet.get(spreadsheetId=spreadsheet_id).execute()
-                sheet_id = sheet_metadata['sheets'][0]['properties']['sheetId']
-                
-                # Create the batch update request
-                batch_request = {
-                    'requests': [
-                        {
-                            'insertDimension': {
-                                'range': {
-                                    'sheetId': sheet_id,
-                                    'dimension': 'ROWS',
-                                    'startIndex': actual_row - 1,  # 0-indexed
-                                    'endIndex': actual_row
-                                }
-                            }
-                        }
-                    ]
-                }
+                # The tab's sheet ID comes from the metadata cache
+                tab = await self._get_tab(spreadsheet_id, range_name)
                 
                 # Execute the batch update to insert the row
-                result1 = sheet.batchUpdate(
-                    spreadsheetId=spreadsheet_id,
-                    body=batch_request
-                ).execute()
+                result1 = await self.client.batch_update(
+                    spreadsheet_id,
+                    [self._dimension_request('insertDimension', tab, actual_row - 1, actual_row)]  # 0-indexed
+                )
+                self.metadata.resize(spreadsheet_id, tab.title, 1)
                 
                 # Now add the data to the newly inserted row
-                result2 = sheet.values().update(
-                    spreadsheetId=spreadsheet_id,
-                    range=f"A{actual_row}:Z{actual_row}",
-                    valueInputOption='RAW',
-                    body={'values': [row_values]}
-                ).execute()
+                result2 = await self.client.values_update(
+                    spreadsheet_id,
+                    rng.rows(actual_row, actual_row),
+                    [row_values]
+                )
                 
                 return {
                     "message": f"Row added successfully at position {row_index}",
@@ -215,6 +278,78 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
                 raise Exception(f"Permission denied: Service account needs Editor role. Current error: {error_msg}")
             else:
                 raise Exception(f"Error adding row: {error_msg}")
+        finally:
+            # Any write, even a failed one, may have changed the sheet
+            self.snapshots.invalidate(spreadsheet_id)
+
+    async def append_rows(self, spreadsheet_id: str, range_name: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Append several rows at the end of the sheet with a single append call"""
+        try:
+            headers = await self._get_headers(spreadsheet_id, range_name, {field for row_data in rows for field in row_data})
+            row_values = [self._prepare_row_values(headers, row_data) for row_data in rows]
+            
+            result = await self.client.values_append(spreadsheet_id, range_name, row_values)
+            self.metadata.resize(spreadsheet_id, A1Range.parse(range_name).tab, len(rows))
+            
+            return {
+                "message": f"{len(rows)} row(s) added successfully at end",
+                "updated_range": result.get('updates', {}).get('updatedRange', ''),
+                "updated_rows": result.get('updates', {}).get('updatedRows', 0),
+                "position": "end"
+            }
+        except Exception as e:
+            raise self._handle_permission_error(e, "appending rows")
+        finally:
+            self.snapshots.invalidate(spreadsheet_id)
+    
+    async def bulk_append_rows(self, spreadsheet_id: str, range_name: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Append many rows in large chunks, stopping at the first failed chunk
+
+        The result lists every attempted chunk and the index of the first row
+        that was not written (next_row), so a client can resume from there.
+        """
+        try:
+            # Map every row to header order once
+            headers = await self._get_headers(spreadsheet_id, range_name, {field for row_data in rows for field in row_data})
+            row_values = [self._prepare_row_values(headers, row_data) for row_data in rows]
+            
+            chunks = []
+            next_row = 0
+            for chunk in self._chunk_by_payload(row_values, settings.BULK_APPEND_MAX_ROWS_PER_CHUNK):
+                chunk_info = {
+                    "chunk": len(chunks),
+                    "first_row": next_row,
+                    "rows": len(chunk)
+                }
+                chunks.append(chunk_info)
+                try:
+                    result = await self.client.values_append(spreadsheet_id, range_name, chunk)
+                except Exception as e:
+                    chunk_info["status"] = "failed"
+                    chunk_info["error"] = str(self._handle_permission_error(e, "appending rows"))
+                    break
+                
+                chunk_info["status"] = "ok"
+                self.metadata.resize(spreadsheet_id, A1Range.parse(range_name).tab, len(chunk))
+                chunk_info["updated_range"] = result.get('updates', {}).get('updatedRange', '')
+                next_row += len(chunk)
+            
+            return {
+                "message": f"Inserted {next_row} of {len(rows)} row(s)",
+                "inserted_rows": next_row,
+                "total_rows": len(rows),
+                "complete": next_row == len(rows),
+                "next_row": next_row,
+                "chunks": chunks
+            }
+        except Exception as e:
+            raise self._handle_permission_error(e, "bulk appending rows")
+        finally:
+            self.snapshots.invalidate(spreadsheet_id)
+    
+    def enqueue_append(self, spreadsheet_id: str, range_name: str, row_data: Dict[str, Any]) -> asyncio.Future:
+        """Queue a row for the next batched append; the future resolves once it is flushed"""
+        return self.append_buffer.submit(spreadsheet_id, range_name, row_data)
 
     async def add_row(self, spreadsheet_id: str, range_name: str, row_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new row to the Google Sheet (legacy method for backward compatibility)"""
@@ -234,8 +369,7 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
         """Check if we have read access to a sheet"""
         try:
             # Try to get sheet metadata
-            sheet = self.service.spreadsheets()
-            result = sheet.get(spreadsheetId=spreadsheet_id).execute()
+            result = await self.client.get_spreadsheet(spreadsheet_id)
             
             return {
                 "has_access": True,
@@ -250,3 +384,6 @@ class GoogleSheetsService(IndexBasedOperations, FieldBasedOperations):
                 "service_account_email": self.get_service_account_email(),
                 "message": "❌ Cannot access sheet. Add service account as editor."
             }
+
+# Shared instance so every router reuses one connection pool
+sheets_service = GoogleSheetsService()
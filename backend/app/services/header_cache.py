@@ -0,0 +1,31 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+# (spreadsheet_id, header row A1 range)
+HeaderKey = Tuple[str, str]
+
+
+class HeaderCache:
+    """Header rows per spreadsheet range, kept for a short TTL and refreshed by every full read"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[HeaderKey, Tuple[List[str], float]] = {}
+
+    def get(self, key: HeaderKey, max_age: Optional[float] = None) -> Optional[List[str]]:
+        """Cached headers younger than max_age (default: the cache TTL), or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        headers, stored_at = entry
+        if time.monotonic() - stored_at > (self.ttl if max_age is None else max_age):
+            return None
+        return headers
+
+    def put(self, key: HeaderKey, headers: List[str]) -> None:
+        """Store headers seen upstream (from a header fetch or a full snapshot)"""
+        self._entries[key] = (list(headers), time.monotonic())
+
+    def invalidate(self, spreadsheet_id: str) -> None:
+        for key in [key for key in self._entries if key[0] == spreadsheet_id]:
+            del self._entries[key]
@@ -1,26 +1,100 @@
-from typing import List, Dict, Any
-from googleapiclient.discovery import Resource
+import json
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from app.core.config import settings
+from app.services.a1_range import A1Range
+from app.services.header_cache import HeaderCache
+from app.services.sheet_metadata import METADATA_FIELDS, MetadataCache, SpreadsheetMetadata, TabProperties
+from app.services.sheets_client import AsyncSheetsClient
+from app.services.single_flight import SingleFlight
+from app.services.snapshot_cache import SheetSnapshot, SnapshotCache
 
 class BaseOperations:
     """Base class for Google Sheets operations with common utilities"""
     
-    def __init__(self, service: Resource):
-        self.service = service
+    def __init__(self, client: AsyncSheetsClient, snapshots: SnapshotCache, reads: SingleFlight, headers: HeaderCache, metadata: MetadataCache):
+        self.client = client
+        self.snapshots = snapshots
+        self.reads = reads
+        self.headers = headers
+        self.metadata = metadata
     
-    async def _get_headers(self, spreadsheet_id: str) -> List[str]:
-        """Get headers from the sheet"""
+    async def get_snapshot(self, spreadsheet_id: str, range_name: str, ttl: Optional[int] = None) -> SheetSnapshot:
+        """Get a snapshot of the range, served from cache while younger than ttl seconds"""
+        if ttl is None:
+            ttl = settings.SNAPSHOT_CACHE_TTL_SECONDS
+        
+        snapshot = self.snapshots.get(spreadsheet_id, range_name, ttl)
+        if snapshot:
+            return snapshot
+        
+        # Keying on the write generation keeps callers arriving after a write
+        # from joining a fetch that started before it
+        generation = self.snapshots.generation(spreadsheet_id)
+        
+        async def fetch() -> SheetSnapshot:
+            result = await self.client.values_get(spreadsheet_id, range_name)
+            snapshot = SheetSnapshot(spreadsheet_id, range_name, result.get('values', []))
+            if ttl > 0:
+                self.snapshots.put(snapshot, generation)
+            # Every full read also refreshes the header cache for free
+            self.headers.put((spreadsheet_id, A1Range.parse(range_name).header_range()), snapshot.table.headers)
+            return snapshot
+        
+        return await self.reads.do((spreadsheet_id, range_name, generation), fetch)
+    
+    async def _get_tab(self, spreadsheet_id: str, range_name: str) -> TabProperties:
+        """Tab the range addresses (sheetId and grid size), from the metadata cache when possible"""
+        title = A1Range.parse(range_name).tab
+        metadata = self.metadata.get(spreadsheet_id)
+        if metadata is None or metadata.tab(title) is None:
+            # A tab missing from cached metadata may have been added or renamed since
+            async def fetch() -> SpreadsheetMetadata:
+                result = await self.client.get_spreadsheet(spreadsheet_id, METADATA_FIELDS)
+                metadata = SpreadsheetMetadata(result.get('sheets', []))
+                self.metadata.put(spreadsheet_id, metadata)
+                return metadata
+            
+            metadata = await self.reads.do(('metadata', spreadsheet_id), fetch)
+        
+        tab = metadata.tab(title)
+        if tab is None:
+            raise Exception(f"Tab '{title}' not found in spreadsheet")
+        return tab
+    
+    def _dimension_request(self, kind: str, tab: TabProperties, start: int, end: int) -> Dict[str, Any]:
+        """insertDimension/deleteDimension request for 0-based grid rows [start, end) of a tab"""
+        return {
+            kind: {
+                'range': {
+                    'sheetId': tab.sheet_id,
+                    'dimension': 'ROWS',
+                    'startIndex': start,
+                    'endIndex': end
+                }
+            }
+        }
+    
+    async def _get_headers(self, spreadsheet_id: str, range_name: str, fields: Iterable[str] = ()) -> List[str]:
+        """Get headers from the first row of the range, using the header cache when fresh
+        
+        Fields the cached headers don't contain suggest a column was added, so
+        they force a refetch unless the cached row is very recent.
+        """
+        header_range = A1Range.parse(range_name).header_range()
+        key = (spreadsheet_id, header_range)
+        headers = self.headers.get(key)
+        if headers is not None and any(field not in headers for field in fields):
+            headers = self.headers.get(key, settings.HEADER_CACHE_RECHECK_SECONDS)
+        if headers is not None:
+            return headers
+        
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=spreadsheet_id,
-                range="A1:Z1"  # Get first row (headers) from first sheet
-            ).execute()
+            result = await self.client.values_get(spreadsheet_id, header_range)
             
             values = result.get('values', [])
-            if not values:
-                return []
-            
-            return values[0]
+            headers = values[0] if values else []
+            self.headers.put(key, headers)
+            return headers
         except Exception as e:
             raise Exception(f"Error getting headers: {str(e)}")
     
@@ -31,6 +105,30 @@ class BaseOperations:
             row_values.append(str(row_data.get(header, "")))
         return row_values
     
+    def _contiguous_runs(self, row_indices: List[int]) -> List[Tuple[int, int]]:
+        """Merge row indices into sorted half-open (start, end) runs"""
+        runs = []
+        for row_index in sorted(set(row_indices)):
+            if runs and runs[-1][1] == row_index:
+                runs[-1] = (runs[-1][0], row_index + 1)
+            else:
+                runs.append((row_index, row_index + 1))
+        return runs
+    
+    def _chunk_by_payload(self, items: List[Any], max_items: Optional[int] = None) -> List[List[Any]]:
+        """Split request items into chunks that stay under SHEETS_MAX_PAYLOAD_BYTES (and max_items)"""
+        chunks = [[]]
+        chunk_bytes = 0
+        for item in items:
+            item_bytes = len(json.dumps(item))
+            chunk_full = max_items is not None and len(chunks[-1]) >= max_items
+            if chunks[-1] and (chunk_full or chunk_bytes + item_bytes > settings.SHEETS_MAX_PAYLOAD_BYTES):
+                chunks.append([])
+                chunk_bytes = 0
+            chunks[-1].append(item)
+            chunk_bytes += item_bytes
+        return chunks
+    
     def _handle_permission_error(self, error: Exception, operation: str) -> Exception:
         """Handle permission errors with helpful messages"""
         error_msg = str(error)
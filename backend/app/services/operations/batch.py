@@ -0,0 +1,158 @@
+from typing import Dict, Any, List
+from app.core.config import settings
+from app.services.a1_range import A1Range
+from app.services.sheet_metadata import TabProperties
+from .base import BaseOperations
+
+class BatchOperations(BaseOperations):
+    """Mixed create/update/delete batches compiled into spreadsheets.batchUpdate calls"""
+
+    async def apply_batch(self, spreadsheet_id: str, range_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply a list of row mutations in as few batchUpdate calls as possible
+
+        Every row_index, position and field criteria refers to the sheet as it was
+        before the batch. Requests are emitted bottom-up, so each one targets rows
+        that no earlier request in the batch has shifted.
+        """
+        try:
+            snapshot = await self.get_snapshot(spreadsheet_id, range_name, settings.SNAPSHOT_WRITE_MAX_AGE_SECONDS)
+            table = snapshot.table
+            headers = table.headers
+
+            updates: Dict[int, Dict[str, Any]] = {}    # row -> merged row data
+            deletes = set()
+            inserts: Dict[int, List[List[str]]] = {}   # insert before row -> new rows, in order
+            results = []
+
+            # 1. Resolve every operation against the snapshot (nothing is sent if one is invalid)
+            for i, operation in enumerate(operations):
+                rows = self._resolve_batch_rows(table, operation, i)
+                op = operation["op"]
+                data = operation.get("data") or {}
+                status = "ok" if rows or op == "insert" else "no_match"
+
+                if op == "update":
+                    for row in rows:
+                        if row not in updates:
+                            updates[row] = dict.fromkeys(headers, "")
+                            # Field-based updates are partial; index-based updates replace the row
+                            if operation.get("where") is not None:
+                                updates[row].update(table.record(row))
+                        updates[row].update(data)
+                elif op == "delete":
+                    deletes.update(rows)
+                elif op == "insert":
+                    anchor = self._resolve_insert_anchor(table, operation, rows, i)
+                    if anchor is None:
+                        status = "no_match"
+                    else:
+                        inserts.setdefault(anchor, []).append(self._prepare_row_values(headers, data))
+                        rows = [anchor]
+
+                results.append({"index": i, "op": op, "status": status, "rows": rows})
+
+            # 2. Compile into batchUpdate requests, bottom-up, against the endpoint's tab
+            tab = await self._get_tab(spreadsheet_id, range_name)
+            requests = self._compile_batch(tab, A1Range.parse(range_name), headers, updates, deletes, inserts)
+
+            # 3. Send them, splitting only for oversized payloads
+            chunks = self._chunk_by_payload(requests) if requests else []
+            for chunk in chunks:
+                await self.client.batch_update(spreadsheet_id, chunk)
+            inserted = sum(len(rows) for rows in inserts.values())
+            self.metadata.resize(spreadsheet_id, tab.title, inserted - len(deletes))
+
+            return {
+                "message": f"Applied {len(operations)} operation(s)",
+                "operations": len(operations),
+                "updated_rows": len(set(updates) - deletes),
+                "deleted_rows": len(deletes),
+                "inserted_rows": inserted,
+                "batch_requests": len(chunks),
+                "results": results
+            }
+
+        except ValueError:
+            raise
+        except Exception as e:
+            raise self._handle_permission_error(e, "applying batch")
+        finally:
+            self.snapshots.invalidate(spreadsheet_id)
+
+    def _resolve_batch_rows(self, table, operation: Dict[str, Any], i: int) -> List[int]:
+        """Rows an operation targets: its row_index or the rows matching its criteria"""
+        if operation.get("where") is not None:
+            if not operation["where"]:
+                raise ValueError(f"Operation {i}: at least one field criteria must be provided")
+            return table.match(operation["where"])
+
+        row_index = operation.get("row_index")
+        if row_index is None:
+            if operation["op"] == "insert":
+                return []
+            raise ValueError(f"Operation {i}: row_index or where is required")
+        if not 0 <= row_index < table.num_rows:
+            raise ValueError(f"Operation {i}: row_index {row_index} out of range")
+        return [row_index]
+
+    def _resolve_insert_anchor(self, table, operation: Dict[str, Any], matches: List[int], i: int):
+        """Row the new row is inserted before (table.num_rows appends at the end)"""
+        if operation.get("where") is not None:
+            # Insert after the last matching row, like insert_row_after_field_match
+            return max(matches) + 1 if matches else None
+
+        position = str(operation.get("position") or "end")
+        if position == "end":
+            return table.num_rows
+        if position == "beg":
+            return 0
+        try:
+            row_index = int(position)
+        except ValueError:
+            raise ValueError(f"Operation {i}: invalid position '{position}'. Use 'beg', 'end', or a number.")
+        if not 1 <= row_index <= table.num_rows + 1:
+            raise ValueError(f"Operation {i}: position {row_index} out of range")
+        return row_index - 1
+
+    def _compile_batch(self, tab: TabProperties, rng: A1Range, headers: List[str], updates: Dict[int, Dict[str, Any]], deletes: set, inserts: Dict[int, List[List[str]]]) -> List[Dict[str, Any]]:
+        """Emit batchUpdate requests from the bottom row up so indices never need shifting"""
+        requests = []
+        run = None  # Pending run of adjacent deleted rows (start, end)
+        offset = rng.data_row(0) - 1  # 0-based grid row of data row 0
+
+        def flush_run():
+            if run:
+                requests.append(self._dimension_request('deleteDimension', tab, run[0] + offset, run[1] + offset))
+
+        for row in sorted(set(updates) | deletes | set(inserts), reverse=True):
+            if row in deletes:
+                if run and run[0] == row + 1:
+                    run = (row, run[1])
+                else:
+                    flush_run()
+                    run = (row, row + 1)
+            elif row in updates:
+                requests.append(self._update_cells_request(tab, rng.start_col, row + offset, [self._prepare_row_values(headers, updates[row])]))
+
+            if row in inserts:
+                # Rows inserted before `row` would split a delete run that continues above it
+                flush_run()
+                run = None
+                new_rows = inserts[row]
+                requests.append(self._dimension_request('insertDimension', tab, row + offset, row + offset + len(new_rows)))
+                requests.append(self._update_cells_request(tab, rng.start_col, row + offset, new_rows))
+
+        flush_run()
+        return requests
+
+    def _update_cells_request(self, tab: TabProperties, column: int, grid_row: int, rows: List[List[str]]) -> Dict[str, Any]:
+        return {
+            'updateCells': {
+                'start': {'sheetId': tab.sheet_id, 'rowIndex': grid_row, 'columnIndex': column},
+                'rows': [
+                    {'values': [{'userEnteredValue': {'stringValue': value}} for value in values]}
+                    for values in rows
+                ],
+                'fields': 'userEnteredValue'
+            }
+        }
@@ -1,4 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any
+from app.core.config import settings
+from app.services.a1_range import A1Range
 from .base import BaseOperations
 
 class FieldBasedOperations(BaseOperations):
@@ -7,15 +9,10 @@ class FieldBasedOperations(BaseOperations):
     async def update_rows_by_field(self, spreadsheet_id: str, range_name: str, field_criteria: Dict[str, str], row_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update rows in the Google Sheet that match field criteria"""
         try:
-            # Get current data to find matching rows
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=spreadsheet_id,
-                range="A1:Z1000"  # Get all data
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values or len(values) < 2:  # Need headers + at least one data row
+            # Get a recent snapshot of the endpoint range to find matching rows
+            snapshot = await self.get_snapshot(spreadsheet_id, range_name, settings.SNAPSHOT_WRITE_MAX_AGE_SECONDS)
+            table = snapshot.table
+            if table.num_rows == 0:  # Need headers + at least one data row
                 return {
                     "message": "No data found to update",
                     "updated_rows": 0,
@@ -23,14 +20,8 @@ class FieldBasedOperations(BaseOperations):
                     "criteria": field_criteria
                 }
             
-            headers = values[0]
-            data_rows = values[1:]
-            
-            # Find rows that match the criteria
-            matching_row_indices = []
-            for i, row in enumerate(data_rows):
-                if self._row_matches_criteria(row, headers, field_criteria):
-                    matching_row_indices.append(i)
+            # Find rows that match the criteria using the snapshot's column hash indexes
+            matching_row_indices = table.match(field_criteria)
             
             if not matching_row_indices:
                 return {
@@ -40,60 +31,53 @@ class FieldBasedOperations(BaseOperations):
                     "criteria": field_criteria
                 }
             
-            # Update each matching row with partial updates
-            updated_count = 0
+            headers = table.headers
+            
+            # Merge each matching row with the new data (partial update)
+            merged_rows = {}
             for row_index in matching_row_indices:
-                actual_row = row_index + 2  # +2 because: +1 for header, +1 for 1-indexed sheets
-                
-                # Get the current row data
-                current_row = data_rows[row_index]
-                current_row_dict = {}
-                for i, header in enumerate(headers):
-                    if i < len(current_row):
-                        current_row_dict[header] = current_row[i]
-                    else:
-                        current_row_dict[header] = ""
-                
-                # Merge with new data (partial update)
-                merged_data = current_row_dict.copy()
+                merged_data = dict.fromkeys(headers, "")
+                merged_data.update(table.record(row_index))
                 merged_data.update(row_data)
-                
-                # Prepare the merged row values
-                merged_row_values = []
-                for header in headers:
-                    merged_row_values.append(str(merged_data.get(header, "")))
-                
-                result = sheet.values().update(
-                    spreadsheetId=spreadsheet_id,
-                    range=f"A{actual_row}:Z{actual_row}",
-                    valueInputOption='RAW',
-                    body={'values': [merged_row_values]}
-                ).execute()
-                updated_count += 1
+                merged_rows[row_index] = self._prepare_row_values(headers, merged_data)
+            
+            # One value range per run of adjacent rows, all sent in a single batchUpdate
+            rng = A1Range.parse(range_name)
+            data = []
+            for start, end in self._contiguous_runs(matching_row_indices):
+                data.append({
+                    'range': rng.rows(rng.data_row(start), rng.data_row(end - 1)),
+                    'values': [merged_rows[row_index] for row_index in range(start, end)]
+                })
+            
+            # Only split when the payload would exceed Google's request size limit
+            chunks = self._chunk_by_payload(data)
+            for chunk in chunks:
+                await self.client.values_batch_update(spreadsheet_id, chunk)
+            updated_count = len(merged_rows)
             
             return {
                 "message": f"Updated {updated_count} row(s) successfully",
                 "updated_rows": updated_count,
                 "method": "field_based",
                 "criteria": field_criteria,
-                "matching_rows": len(matching_row_indices)
+                "matching_rows": len(matching_row_indices),
+                "batch_requests": len(chunks)
             }
             
         except Exception as e:
             raise self._handle_permission_error(e, "updating rows by field")
+        finally:
+            # Any write, even a partial one, may have changed the sheet
+            self.snapshots.invalidate(spreadsheet_id)
 
     async def delete_rows_by_field(self, spreadsheet_id: str, range_name: str, field_criteria: Dict[str, str]) -> Dict[str, Any]:
         """Delete rows from the Google Sheet that match field criteria"""
         try:
-            # Get current data to find matching rows
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=spreadsheet_id,
-                range="A1:Z1000"  # Get all data
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values or len(values) < 2:  # Need headers + at least one data row
+            # Get a recent snapshot of the endpoint range to find matching rows
+            snapshot = await self.get_snapshot(spreadsheet_id, range_name, settings.SNAPSHOT_WRITE_MAX_AGE_SECONDS)
+            table = snapshot.table
+            if table.num_rows == 0:  # Need headers + at least one data row
                 return {
                     "message": "No data found to delete",
                     "deleted_rows": 0,
@@ -101,14 +85,8 @@ class FieldBasedOperations(BaseOperations):
                     "criteria": field_criteria
                 }
             
-            headers = values[0]
-            data_rows = values[1:]
-            
-            # Find rows that match the criteria
-            matching_row_indices = []
-            for i, row in enumerate(data_rows):
-                if self._row_matches_criteria(row, headers, field_criteria):
-                    matching_row_indices.append(i)
+            # Find rows that match the criteria using the snapshot's column hash indexes
+            matching_row_indices = table.match(field_criteria)
             
             if not matching_row_indices:
                 return {
@@ -118,70 +96,45 @@ class FieldBasedOperations(BaseOperations):
                     "criteria": field_criteria
                 }
             
-            # Delete rows in reverse order to maintain indices
-            deleted_count = 0
-            for row_index in reversed(matching_row_indices):
-                actual_row = row_index + 2  # +2 because: +1 for header, +1 for 1-indexed sheets
-                
-                result = sheet.batchUpdate(
-                    spreadsheetId=spreadsheet_id,
-                    body={
-                        'requests': [
-                            {
-                                'deleteDimension': {
-                                    'range': {
-                                        'sheetId': 0,  # Assuming first sheet
-                                        'dimension': 'ROWS',
-                                        'startIndex': actual_row - 1,  # 0-indexed for API
-                                        'endIndex': actual_row  # 0-indexed for API
-                                    }
-                                }
-                            }
-                        ]
-                    }
-                ).execute()
-                deleted_count += 1
+            # Merge matches into contiguous runs, deleted bottom-up so earlier
+            # requests in the batch never shift the rows of later ones
+            runs = self._contiguous_runs(matching_row_indices)
+            tab = await self._get_tab(spreadsheet_id, range_name)
+            offset = A1Range.parse(range_name).data_row(0) - 1  # 0-based grid row of data row 0
+            requests = [
+                self._dimension_request('deleteDimension', tab, start + offset, end + offset)
+                for start, end in reversed(runs)
+            ]
+            
+            # One batchUpdate for every run, split only for oversized payloads
+            chunks = self._chunk_by_payload(requests)
+            for chunk in chunks:
+                await self.client.batch_update(spreadsheet_id, chunk)
+            deleted_count = len(matching_row_indices)
+            self.metadata.resize(spreadsheet_id, tab.title, -deleted_count)
             
             return {
                 "message": f"Deleted {deleted_count} row(s) successfully",
                 "deleted_rows": deleted_count,
                 "method": "field_based",
                 "criteria": field_criteria,
-                "matching_rows": len(matching_row_indices)
+                "matching_rows": len(matching_row_indices),
+                "deleted_ranges": len(runs),
+                "batch_requests": len(chunks)
             }
             
         except Exception as e:
             raise self._handle_permission_error(e, "deleting rows by field")
-    
-    def _row_matches_criteria(self, row: List[str], headers: List[str], field_criteria: Dict[str, str]) -> bool:
-        """Check if a row matches the given field criteria"""
-        # Create a dict from row data
-        row_dict = {}
-        for i, header in enumerate(headers):
-            if i < len(row):
-                row_dict[header] = row[i]
-            else:
-                row_dict[header] = ""
-        
-        # Check if all criteria match
-        for field, value in field_criteria.items():
-            if field not in row_dict or row_dict[field] != value:
-                return False
-        
-        return True
+        finally:
+            self.snapshots.invalidate(spreadsheet_id)
     
     async def insert_row_after_field_match(self, spreadsheet_id: str, range_name: str, field_criteria: Dict[str, str], row_data: Dict[str, Any]) -> Dict[str, Any]:
         """Insert a new row after rows that match field criteria"""
         try:
-            # Get current data to find matching rows
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=spreadsheet_id,
-                range="A1:Z1000"  # Get all data
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values or len(values) < 2:  # Need headers + at least one data row
+            # Get a recent snapshot of the endpoint range to find matching rows
+            snapshot = await self.get_snapshot(spreadsheet_id, range_name, settings.SNAPSHOT_WRITE_MAX_AGE_SECONDS)
+            table = snapshot.table
+            if table.num_rows == 0:  # Need headers + at least one data row
                 return {
                     "message": "No data found, inserting at beginning",
                     "inserted_rows": 1,
@@ -190,14 +143,8 @@ class FieldBasedOperations(BaseOperations):
                     "position": "beginning"
                 }
             
-            headers = values[0]
-            data_rows = values[1:]
-            
-            # Find rows that match the criteria
-            matching_row_indices = []
-            for i, row in enumerate(data_rows):
-                if self._row_matches_criteria(row, headers, field_criteria):
-                    matching_row_indices.append(i)
+            # Find rows that match the criteria using the snapshot's column hash indexes
+            matching_row_indices = table.match(field_criteria)
             
             if not matching_row_indices:
                 return {
@@ -209,43 +156,30 @@ class FieldBasedOperations(BaseOperations):
                 }
             
             # Get headers and prepare row data
-            headers = await self._get_headers(spreadsheet_id)
+            headers = await self._get_headers(spreadsheet_id, range_name, row_data)
             row_values = self._prepare_row_values(headers, row_data)
             
             # Insert after the last matching row
             last_match_index = max(matching_row_indices)
-            actual_row = last_match_index + 3  # +3 because: +1 for header, +1 for 1-indexed sheets, +1 to insert after
+            rng = A1Range.parse(range_name)
+            actual_row = rng.data_row(last_match_index + 1)  # 1-indexed sheet row just below the match
             
-            # Get the sheet ID
-            sheet_metadata = sheet.get(spreadsheetId=spreadsheet_id).execute()
-            sheet_id = sheet_metadata['sheets'][0]['properties']['sheetId']
+            # Get the tab's sheet ID from the metadata cache
+            tab = await self._get_tab(spreadsheet_id, range_name)
             
             # First insert a row at the specified position
-            result1 = sheet.batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={
-                    'requests': [
-                        {
-                            'insertDimension': {
-                                'range': {
-                                    'sheetId': sheet_id,
-                                    'dimension': 'ROWS',
-                                    'startIndex': actual_row - 1,  # 0-indexed
-                                    'endIndex': actual_row
-                                }
-                            }
-                        }
-                    ]
-                }
-            ).execute()
+            result1 = await self.client.batch_update(
+                spreadsheet_id,
+                [self._dimension_request('insertDimension', tab, actual_row - 1, actual_row)]  # 0-indexed
+            )
+            self.metadata.resize(spreadsheet_id, tab.title, 1)
             
             # Then add the data to the new row
-            result2 = sheet.values().update(
-                spreadsheetId=spreadsheet_id,
-                range=f"A{actual_row}:Z{actual_row}",
-                valueInputOption='RAW',
-                body={'values': [row_values]}
-            ).execute()
+            result2 = await self.client.values_update(
+                spreadsheet_id,
+                rng.rows(actual_row, actual_row),
+                [row_values]
+            )
             
             return {
                 "message": f"Row inserted successfully after matching row",
@@ -257,4 +191,6 @@ class FieldBasedOperations(BaseOperations):
             }
             
         except Exception as e:
-            raise self._handle_permission_error(e, "inserting row after field match") 
\ No newline at end of file
+            raise self._handle_permission_error(e, "inserting row after field match")
+        finally:
+            self.snapshots.invalidate(spreadsheet_id) 
\ No newline at end of file
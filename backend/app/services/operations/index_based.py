@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from app.services.a1_range import A1Range
 from .base import BaseOperations
 
 class IndexBasedOperations(BaseOperations):
@@ -8,22 +9,21 @@ class IndexBasedOperations(BaseOperations):
         """Update an existing row in the Google Sheet by index"""
         try:
             # Get current headers
-            headers = await self._get_headers(spreadsheet_id)
+            headers = await self._get_headers(spreadsheet_id, range_name, row_data)
             
             # Prepare row data in the correct order
             row_values = self._prepare_row_values(headers, row_data)
             
-            # Calculate the actual row range (add 1 for header row, add 1 because sheets are 1-indexed)
-            actual_row = row_index + 2  # +2 because: +1 for header, +1 for 1-indexed sheets
+            # Calculate the actual row range (1-indexed sheet row below the range's header row)
+            rng = A1Range.parse(range_name)
+            actual_row = rng.data_row(row_index)
             
             # Update the row
-            sheet = self.service.spreadsheets()
-            result = sheet.values().update(
-                spreadsheetId=spreadsheet_id,
-                range=f"A{actual_row}:Z{actual_row}",  # Use simple range format
-                valueInputOption='RAW',
-                body={'values': [row_values]}
-            ).execute()
+            result = await self.client.values_update(
+                spreadsheet_id,
+                rng.rows(actual_row, actual_row),  # Same tab and columns as the endpoint range
+                [row_values]
+            )
             
             return {
                 "message": "Row updated successfully",
@@ -35,32 +35,26 @@ class IndexBasedOperations(BaseOperations):
             
         except Exception as e:
             raise self._handle_permission_error(e, "updating row by index")
+        finally:
+            # Any write, even a failed one, may have changed the sheet
+            self.snapshots.invalidate(spreadsheet_id)
+            if row_index < 0:
+                # A negative index reaches the header row itself
+                self.headers.invalidate(spreadsheet_id)
 
     async def delete_row_by_index(self, spreadsheet_id: str, range_name: str, row_index: int) -> Dict[str, Any]:
         """Delete a row from the Google Sheet by index"""
         try:
-            # Calculate the actual row number (add 1 for header row, add 1 because sheets are 1-indexed)
-            actual_row = row_index + 2  # +2 because: +1 for header, +1 for 1-indexed sheets
+            # Calculate the actual row number (1-indexed sheet row below the range's header row)
+            actual_row = A1Range.parse(range_name).data_row(row_index)
             
-            # Delete the row using batchUpdate
-            sheet = self.service.spreadsheets()
-            result = sheet.batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={
-                    'requests': [
-                        {
-                            'deleteDimension': {
-                                'range': {
-                                    'sheetId': 0,  # Assuming first sheet, you might need to get actual sheet ID
-                                    'dimension': 'ROWS',
-                                    'startIndex': actual_row - 1,  # 0-indexed for API
-                                    'endIndex': actual_row  # 0-indexed for API
-                                }
-                            }
-                        }
-                    ]
-                }
-            ).execute()
+            # Delete the row from the endpoint's tab using batchUpdate
+            tab = await self._get_tab(spreadsheet_id, range_name)
+            result = await self.client.batch_update(
+                spreadsheet_id,
+                [self._dimension_request('deleteDimension', tab, actual_row - 1, actual_row)]  # 0-indexed for API
+            )
+            self.metadata.resize(spreadsheet_id, tab.title, -1)
             
             return {
                 "message": "Row deleted successfully",
@@ -70,4 +64,8 @@ class IndexBasedOperations(BaseOperations):
             }
             
         except Exception as e:
-            raise self._handle_permission_error(e, "deleting row by index") 
\ No newline at end of file
+            raise self._handle_permission_error(e, "deleting row by index")
+        finally:
+            self.snapshots.invalidate(spreadsheet_id)
+            if row_index < 0:
+                self.headers.invalidate(spreadsheet_id) 
\ No newline at end of file
@@ -0,0 +1,79 @@
+import gzip
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Hashable, Optional
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+class CachedResponse:
+    """Encoded response body plus the headers it was served with; gzip variant built on first demand"""
+
+    def __init__(self, body: bytes, media_type: str, headers: Dict[str, str]):
+        self.body = body
+        self.media_type = media_type
+        self.headers = headers
+        self.gzip_body: Optional[bytes] = None
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.body) + len(self.gzip_body or b"")
+
+    async def compressed(self) -> Optional[bytes]:
+        if len(self.body) < GZIP_MIN_BYTES:
+            return None
+        if self.gzip_body is None:
+            # Off the event loop: large exports take long enough to stall every other request
+            gzip_body = await run_in_threadpool(gzip.compress, self.body, 5)
+            if self.gzip_body is None:
+                self.gzip_body = gzip_body
+        return self.gzip_body
+
+
+class ResponseCache:
+    """LRU cache of fully encoded GET responses under a byte budget
+
+    Keys include the snapshot version, so entries never go stale: once a
+    write produces a new snapshot they simply stop being hit and age out.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        # Bytes counted into total_bytes for each entry (the gzip variant is added later)
+        self._sizes: Dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: CachedResponse) -> None:
+        # A single huge export should not flush every hot dashboard query
+        if entry.size_bytes > self.max_bytes // 4:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._sizes[key] = entry.size_bytes
+        self.total_bytes += entry.size_bytes
+        self._evict()
+
+    def resized(self, key: Hashable) -> None:
+        """Account for an entry that grew (its gzip variant was added)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.total_bytes += entry.size_bytes - self._sizes[key]
+            self._sizes[key] = entry.size_bytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable) -> None:
+        self._entries.pop(key)
+        self.total_bytes -= self._sizes.pop(key)
@@ -0,0 +1,195 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Set, Tuple
+from app.services.sheet_table import NUMBER_PATTERN, SheetTable
+
+TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        |(?P<symbol>!=|>=|<=|=|>|<|\(|\)|,)
+        |(?P<word>[^\s()=!<>,'"]+)
+    )""",
+    re.VERBOSE,
+)
+
+SYMBOL_OPERATORS = {"=": "eq", "!=": "ne", ">": "gt", ">=": "ge", "<": "lt", "<=": "le"}
+WORD_OPERATORS = {"eq", "ne", "gt", "ge", "lt", "le", "in", "contains", "startswith"}
+NUMERIC_OPERATORS = {"gt", "ge", "lt", "le"}
+
+
+class RowFilter:
+    """Filter expression over sheet columns, evaluated on the table's indexes
+
+    Syntax: comparisons such as `age gt 30`, `status = "open"`,
+    `city in (Paris, "New York")`, `name contains ann` or `code startswith AB`,
+    combined with `and` / `or` and grouped with parentheses (and binds tighter).
+    Column names and values with spaces or symbols are quoted. gt/ge/lt/le
+    compare numerically and skip non-numeric cells; contains/startswith ignore case.
+    """
+
+    def __init__(self, node: tuple):
+        # ("and" | "or", [children]) or ("cmp", column, operator, [values])
+        self.node = node
+
+    @classmethod
+    def parse(cls, text: str) -> "RowFilter":
+        tokens = _tokenize(text)
+        parser = _Parser(tokens)
+        node = parser.parse_or()
+        if parser.peek() is not None:
+            raise ValueError(f"Unexpected '{parser.peek()[1]}' in filter")
+        return cls(node)
+
+    def select(self, table: SheetTable) -> List[int]:
+        """Positions of matching rows, in sheet order"""
+        return sorted(self._evaluate(table, self.node))
+
+    def _evaluate(self, table: SheetTable, node: tuple) -> Set[int]:
+        kind = node[0]
+        if kind == "and":
+            # Intersect from the smallest result so the working set only shrinks
+            results = sorted((self._evaluate(table, child) for child in node[1]), key=len)
+            selected = results[0]
+            for result in results[1:]:
+                selected = selected & result
+            return selected
+        if kind == "or":
+            selected = set()
+            for child in node[1]:
+                selected |= self._evaluate(table, child)
+            return selected
+        return self._compare(table, *node[1:])
+
+    def _compare(self, table: SheetTable, name: str, operator: str, values: List[str]) -> Set[int]:
+        column = table.find_column(name)
+        if column is None:
+            raise ValueError(f"Unknown column '{name}' in filter. Available columns: {table.headers}")
+        index = table.value_index(column)
+
+        if operator in ("eq", "in"):
+            selected = set()
+            for value in values:
+                selected.update(index.get(value, ()))
+            return selected
+        if operator == "ne":
+            return set(table.positions()) - set(index.get(values[0], ()))
+        if operator in NUMERIC_OPERATORS:
+            return self._numeric_range(table, column, operator, values[0])
+
+        # Text predicates scan distinct values, not rows
+        needle = values[0].lower()
+        selected = set()
+        for value, postings in index.items():
+            lowered = value.lower()
+            if lowered.startswith(needle) if operator == "startswith" else needle in lowered:
+                selected.update(postings)
+        return selected
+
+    def _numeric_range(self, table: SheetTable, column: str, operator: str, value: str) -> Set[int]:
+        if not NUMBER_PATTERN.match(value.strip()):
+            raise ValueError(f"'{operator}' needs a number, got '{value}'")
+        number = float(value)
+        numbers, positions = table.numeric_index(column)
+        if operator == "gt":
+            return set(positions[bisect_right(numbers, number):])
+        if operator == "ge":
+            return set(positions[bisect_left(numbers, number):])
+        if operator == "lt":
+            return set(positions[:bisect_left(numbers, number)])
+        return set(positions[:bisect_right(numbers, number)])
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Invalid filter near '{text[position:position + 20]}'")
+        position = match.end()
+        if match.group("string") is not None:
+            raw = match.group("string")[1:-1]
+            tokens.append(("string", re.sub(r"\\(.)", r"\1", raw)))
+        elif match.group("symbol") is not None:
+            tokens.append(("symbol", match.group("symbol")))
+        else:
+            tokens.append(("word", match.group("word")))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the token list: or -> and -> comparison | (or)"""
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def next(self, expected: str) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise ValueError(f"Filter ended early, expected {expected}")
+        self.index += 1
+        return token
+
+    def keyword(self, word: str) -> bool:
+        token = self.peek()
+        if token and token[0] == "word" and token[1].lower() == word:
+            self.index += 1
+            return True
+        return False
+
+    def symbol(self, symbol: str) -> bool:
+        if self.peek() == ("symbol", symbol):
+            self.index += 1
+            return True
+        return False
+
+    def parse_or(self) -> tuple:
+        children = [self.parse_and()]
+        while self.keyword("or"):
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and(self) -> tuple:
+        children = [self.parse_term()]
+        while self.keyword("and"):
+            children.append(self.parse_term())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_term(self) -> tuple:
+        if self.symbol("("):
+            node = self.parse_or()
+            if not self.symbol(")"):
+                raise ValueError("Missing ')' in filter")
+            return node
+
+        kind, column = self.next("a column name")
+        if kind == "symbol":
+            raise ValueError(f"Expected a column name, got '{column}'")
+
+        kind, operator = self.next("an operator")
+        operator = SYMBOL_OPERATORS.get(operator, operator) if kind == "symbol" else operator.lower()
+        if operator not in WORD_OPERATORS:
+            raise ValueError(f"Unknown filter operator '{operator}'")
+
+        if operator == "in":
+            if not self.symbol("("):
+                raise ValueError("'in' needs a parenthesized list of values")
+            values = [self.value()]
+            while self.symbol(","):
+                values.append(self.value())
+            if not self.symbol(")"):
+                raise ValueError("Missing ')' after 'in' values")
+            return ("cmp", column, operator, values)
+
+        return ("cmp", column, operator, [self.value()])
+
+    def value(self) -> str:
+        kind, value = self.next("a value")
+        if kind == "symbol":
+            raise ValueError(f"Expected a value, got '{value}'")
+        return value
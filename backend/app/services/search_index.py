@@ -0,0 +1,128 @@
+import hashlib
+import math
+import re
+import sys
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.services.sheet_table import SheetTable
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Rough memory of the index structures (CPython dicts, tuples and ints), for the byte budget
+TOKEN_OVERHEAD_BYTES = 250   # token string plus its postings dict
+POSTING_BYTES = 70           # one position -> count entry
+ROW_OVERHEAD_BYTES = 150     # row digest plus its tuple of tokens
+ROW_TOKEN_BYTES = 70         # one (token, count) pair of a row
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index (token -> row positions with term counts) over every column of a snapshot
+
+    Rows are tokenized once per distinct content: building from a previous
+    index of the same range reuses the token counts of every unchanged row.
+    Rows are remembered by a 16-byte digest, so the index keeps no cell data.
+    """
+
+    def __init__(self, version: int, num_rows: int, postings: Dict[str, Dict[int, int]], row_tokens: Dict[bytes, Tuple[Tuple[str, int], ...]]):
+        self.version = version
+        self.num_rows = num_rows
+        self.postings = postings
+        self._row_tokens = row_tokens
+        self._vocabulary: Optional[List[str]] = None
+        self.size_bytes = (
+            len(postings) * TOKEN_OVERHEAD_BYTES
+            + sum(len(token_postings) for token_postings in postings.values()) * POSTING_BYTES
+            + len(row_tokens) * ROW_OVERHEAD_BYTES
+            + sum(len(tokens) for tokens in row_tokens.values()) * ROW_TOKEN_BYTES
+        )
+
+    @classmethod
+    def build(cls, table: SheetTable, version: int, previous: Optional["SearchIndex"] = None) -> "SearchIndex":
+        known = previous._row_tokens if previous else {}
+        row_tokens: Dict[bytes, Tuple[Tuple[str, int], ...]] = {}
+        postings: Dict[str, Dict[int, int]] = {}
+
+        for position in table.positions():
+            row = [column[position] or "" for column in table.columns]
+            digest = hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=16).digest()
+            tokens = row_tokens.get(digest) or known.get(digest)
+            if tokens is None:
+                # Interned so rows and postings share one string per token
+                counts = Counter(sys.intern(token) for cell in row if cell for token in tokenize(cell))
+                tokens = tuple(counts.items())
+            row_tokens[digest] = tokens
+            for token, count in tokens:
+                postings.setdefault(token, {})[position] = count
+
+        return cls(version, table.num_rows, postings, row_tokens)
+
+    def _expand(self, term: str) -> List[str]:
+        """Indexed tokens starting with term (prefix match, so partial words still hit)"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        tokens = []
+        for i in range(bisect_left(self._vocabulary, term), len(self._vocabulary)):
+            token = self._vocabulary[i]
+            if not token.startswith(term):
+                break
+            tokens.append(token)
+        return tokens
+
+    def search(self, query: str) -> List[int]:
+        """Positions of rows containing every query term, best tf-idf score first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: Optional[Dict[int, float]] = None
+        for term in dict.fromkeys(terms):
+            term_scores: Dict[int, float] = {}
+            for token in self._expand(term):
+                token_postings = self.postings[token]
+                idf = math.log(1 + self.num_rows / len(token_postings))
+                for position, count in token_postings.items():
+                    term_scores[position] = term_scores.get(position, 0.0) + count * idf
+            if scores is None:
+                scores = term_scores
+            else:
+                # Every term must match: keep only rows seen for all terms so far
+                scores = {position: score + term_scores[position] for position, score in scores.items() if position in term_scores}
+            if not scores:
+                return []
+
+        return sorted(scores, key=lambda position: (-scores[position], position))
+
+
+class SearchIndexCache:
+    """Latest search index per (spreadsheet_id, range) under a byte budget, LRU evicted
+
+    New snapshots rebuild from the previous index of their range. An index
+    larger than a quarter of the budget is used for its request but not kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], SearchIndex]" = OrderedDict()
+
+    def get(self, snapshot) -> SearchIndex:
+        key = (snapshot.spreadsheet_id, snapshot.range_name)
+        index = self._entries.get(key)
+        if index is not None and index.version == snapshot.version:
+            self._entries.move_to_end(key)
+            return index
+
+        index = SearchIndex.build(snapshot.table, snapshot.version, index)
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key).size_bytes
+        if index.size_bytes <= self.max_bytes // 4:
+            self._entries[key] = index
+            self.total_bytes += index.size_bytes
+            while self.total_bytes > self.max_bytes:
+                self.total_bytes -= self._entries.popitem(last=False)[1].size_bytes
+        return index
@@ -0,0 +1,67 @@
+import time
+from typing import Any, Dict, List, Optional
+
+# Only the tab properties the operations need, not the whole spreadsheet resource
+METADATA_FIELDS = "sheets.properties(sheetId,title,index,gridProperties(rowCount,columnCount))"
+
+
+class TabProperties:
+    """sheetId and grid size of one tab"""
+
+    def __init__(self, sheet_id: int, title: str, index: int, row_count: int, column_count: int):
+        self.sheet_id = sheet_id
+        self.title = title
+        self.index = index
+        self.row_count = row_count
+        self.column_count = column_count
+
+
+class SpreadsheetMetadata:
+    """Tabs of one spreadsheet by title, as fetched at one point in time"""
+
+    def __init__(self, sheets: List[Dict[str, Any]]):
+        self.loaded_at = time.monotonic()
+        self.tabs: Dict[str, TabProperties] = {}
+        for sheet in sheets:
+            properties = sheet.get("properties", {})
+            grid = properties.get("gridProperties", {})
+            tab = TabProperties(
+                properties.get("sheetId", 0),
+                properties.get("title", ""),
+                properties.get("index", 0),
+                grid.get("rowCount", 0),
+                grid.get("columnCount", 0),
+            )
+            self.tabs[tab.title] = tab
+        # Ranges without a tab name address the first tab
+        self.first = min(self.tabs.values(), key=lambda tab: tab.index, default=None)
+
+    def tab(self, title: Optional[str]) -> Optional[TabProperties]:
+        return self.first if title is None else self.tabs.get(title)
+
+
+class MetadataCache:
+    """Tab metadata per spreadsheet, refreshed lazily after ttl seconds"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, SpreadsheetMetadata] = {}
+
+    def get(self, spreadsheet_id: str) -> Optional[SpreadsheetMetadata]:
+        metadata = self._entries.get(spreadsheet_id)
+        if metadata is None or time.monotonic() - metadata.loaded_at > self.ttl:
+            return None
+        return metadata
+
+    def put(self, spreadsheet_id: str, metadata: SpreadsheetMetadata) -> None:
+        self._entries[spreadsheet_id] = metadata
+
+    def resize(self, spreadsheet_id: str, title: Optional[str], rows: int) -> None:
+        """Track rows inserted (or deleted, if negative) by our own writes"""
+        metadata = self._entries.get(spreadsheet_id)
+        tab = metadata.tab(title) if metadata else None
+        if tab is not None:
+            tab.row_count = max(tab.row_count + rows, 0)
+
+    def invalidate(self, spreadsheet_id: str) -> None:
+        self._entries.pop(spreadsheet_id, None)
@@ -0,0 +1,220 @@
+import math
+import re
+from array import array
+from typing import Callable, List, Dict, Any, Optional, Sequence, Tuple, Union
+
+# Rough per-cell overhead of a Python str inside a list, used for the memory estimate
+CELL_OVERHEAD_BYTES = 56
+# Rough overhead of an array object plus its dict slot (per value index entry)
+ARRAY_OVERHEAD_BYTES = 80
+
+NUMBER_PATTERN = re.compile(r"^-?(\d+\.?\d*|\.\d+)$")
+
+
+def typed_sort_key(value: str) -> Tuple[int, Union[float, str]]:
+    """Order numbers (numerically) before text (case-insensitively)
+
+    Ranking by type first means mixed columns never compare int with str.
+    """
+    stripped = value.strip()
+    if NUMBER_PATTERN.match(stripped):
+        return (0, float(stripped))
+    return (1, value.lower())
+
+
+def _array_bytes(values: array) -> int:
+    return values.itemsize * len(values)
+
+
+class SheetTable:
+    """Column-oriented copy of a sheet range: one list per column plus a row-id vector
+
+    Cells missing from short rows (Google drops trailing empty cells) are stored
+    as None so records keep the same keys as dict(zip(headers, row)).
+    """
+
+    def __init__(self, headers: List[str], columns: List[List[Optional[str]]], row_ids: array, size_bytes: int = 0):
+        self.headers = headers
+        self.columns = columns
+        self.row_ids = row_ids
+        self.num_rows = len(row_ids)
+        self.size_bytes = size_bytes
+        # Duplicate headers resolve to the last column, matching dict(zip(...)) semantics
+        self._column_index = {header: i for i, header in enumerate(headers)}
+        # Sort permutations built lazily, once per (column, direction)
+        self._sort_permutations: Dict[Tuple[str, bool], array] = {}
+        # Hash indexes (cell value -> ascending row positions) built lazily per column
+        self._value_indexes: Dict[str, Dict[str, array]] = {}
+        # Numeric cells of a column as parallel (sorted values, positions) arrays
+        self._numeric_indexes: Dict[str, Tuple[array, array]] = {}
+        # Column cells parsed as floats (NaN where not numeric), by position
+        self._numeric_columns: Dict[str, array] = {}
+        # Called with the added bytes whenever a lazy structure grows size_bytes
+        self.on_grow: Optional[Callable[[int], None]] = None
+
+    @classmethod
+    def from_values(cls, values: List[List[str]]) -> "SheetTable":
+        """Build a table from the values array returned by the Sheets API"""
+        if not values:
+            return cls([], [], array('l'))
+
+        headers = values[0]
+        rows = values[1:]
+        width = len(headers)
+        columns: List[List[Optional[str]]] = [[None] * len(rows) for _ in range(width)]
+        size_bytes = sum(len(cell) + CELL_OVERHEAD_BYTES for cell in headers)
+
+        for position, row in enumerate(rows):
+            for col, cell in enumerate(row[:width]):
+                columns[col][position] = cell
+                size_bytes += len(cell) + CELL_OVERHEAD_BYTES
+
+        return cls(headers, columns, array('l', range(len(rows))), size_bytes)
+
+    def _grow(self, nbytes: int) -> None:
+        self.size_bytes += nbytes
+        if self.on_grow is not None:
+            self.on_grow(nbytes)
+
+    def has_column(self, name: str) -> bool:
+        return name in self._column_index
+
+    def column(self, name: str) -> List[Optional[str]]:
+        """Cells of a column by exact header name"""
+        return self.columns[self._column_index[name]]
+
+    def find_column(self, name: str) -> Optional[str]:
+        """Resolve a header name case-insensitively"""
+        if name in self._column_index:
+            return name
+        lowered = name.lower()
+        for header in self.headers:
+            if header.lower() == lowered:
+                return header
+        return None
+
+    def positions(self) -> Sequence[int]:
+        """All row positions in sheet order"""
+        return range(self.num_rows)
+
+    def sort_permutation(self, name: str, descending: bool = False) -> array:
+        """Row positions ordered by a column; empty cells always sort last"""
+        key = (name, descending)
+        permutation = self._sort_permutations.get(key)
+        if permutation is not None:
+            return permutation
+
+        column = self.column(name)
+        keyed = []
+        empty = []
+        for position, value in enumerate(column):
+            if value is None or value == "":
+                empty.append(position)
+            else:
+                keyed.append((typed_sort_key(value), position))
+
+        # Sort on the key only so equal values keep sheet order in both directions
+        keyed.sort(key=lambda item: item[0], reverse=descending)
+        permutation = array('l', [position for _, position in keyed])
+        permutation.extend(empty)
+
+        self._sort_permutations[key] = permutation
+        self._grow(_array_bytes(permutation))
+        return permutation
+
+    def value_index(self, name: str) -> Dict[str, array]:
+        """Map each cell value of a column to its row positions; missing cells index as ''"""
+        index = self._value_indexes.get(name)
+        if index is not None:
+            return index
+
+        index = {}
+        for position, value in enumerate(self.column(name)):
+            postings = index.get(value or "")
+            if postings is None:
+                postings = index[value or ""] = array('l')
+            postings.append(position)
+
+        self._value_indexes[name] = index
+        self._grow(sum(len(value) + CELL_OVERHEAD_BYTES + ARRAY_OVERHEAD_BYTES + _array_bytes(postings) for value, postings in index.items()))
+        return index
+
+    def numeric_index(self, name: str) -> Tuple[array, array]:
+        """Numeric cells of a column sorted by value, for range lookups with bisect"""
+        index = self._numeric_indexes.get(name)
+        if index is not None:
+            return index
+
+        keyed = []
+        for value, postings in self.value_index(name).items():
+            stripped = value.strip()
+            if NUMBER_PATTERN.match(stripped):
+                number = float(stripped)
+                keyed.extend((number, position) for position in postings)
+        keyed.sort()
+
+        index = (array('d', [number for number, _ in keyed]), array('l', [position for _, position in keyed]))
+        self._numeric_indexes[name] = index
+        self._grow(_array_bytes(index[0]) + _array_bytes(index[1]))
+        return index
+
+    def numeric_column(self, name: str) -> array:
+        """Cells of a column as floats by position; empty and text cells are NaN"""
+        numbers = self._numeric_columns.get(name)
+        if numbers is not None:
+            return numbers
+
+        numbers = array('d', [math.nan]) * self.num_rows
+        for value, postings in self.value_index(name).items():
+            stripped = value.strip()
+            if NUMBER_PATTERN.match(stripped):
+                number = float(stripped)
+                for position in postings:
+                    numbers[position] = number
+
+        self._numeric_columns[name] = numbers
+        self._grow(_array_bytes(numbers))
+        return numbers
+
+    def match(self, criteria: Dict[str, str]) -> List[int]:
+        """Positions of rows whose cells equal every criteria value, in sheet order"""
+        postings_by_field = []
+        for field, value in criteria.items():
+            if not self.has_column(field):
+                return []
+            postings = self.value_index(field).get(value)
+            if not postings:
+                return []
+            postings_by_field.append((postings, field, value))
+
+        if not postings_by_field:
+            return list(self.positions())
+
+        # Intersect starting from the shortest posting list, probing the other
+        # criteria by direct column lookup instead of materializing more sets
+        postings_by_field.sort(key=lambda item: len(item[0]))
+        candidates, _, _ = postings_by_field[0]
+        checks = [(self.column(field), value) for _, field, value in postings_by_field[1:]]
+        return [
+            position for position in candidates
+            if all((column[position] or "") == value for column, value in checks)
+        ]
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """Build the row dict for one position"""
+        record = {}
+        for header, column in zip(self.headers, self.columns):
+            value = column[position]
+            if value is not None:
+                record[header] = value
+        return record
+
+    def records(self, positions: Sequence[int]) -> List[Dict[str, Any]]:
+        """Build row dicts only for the requested positions"""
+        return [self.record(position) for position in positions]
+
+    def take(self, positions: Sequence[int]) -> List[List[Optional[str]]]:
+        """Cells of every column (in header order) at the requested positions"""
+        if isinstance(positions, range) and positions.step == 1:
+            return [column[positions.start:positions.stop] for column in self.columns]
+        return [[column[position] for position in positions] for column in self.columns]
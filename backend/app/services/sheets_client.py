@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import List, Dict, Any, Optional
+from urllib.parse import quote
+
+import httpx
+from google.auth import jwt as google_jwt
+from google.oauth2 import service_account
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+TOKEN_GRANT_TYPE = "urn:ietf:params:oauth:grant-type:jwt-bearer"
+
+
+class SheetsAPIError(Exception):
+    """Error returned by the Google Sheets REST API"""
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"HTTP {status_code}: {message}")
+
+
+class ServiceAccountTokenSource:
+    """Signs service-account assertions and caches the resulting access token"""
+
+    # Refresh a bit before Google's expiry so in-flight requests never carry a stale token
+    REFRESH_MARGIN_SECONDS = 60
+    TOKEN_LIFETIME_SECONDS = 3600
+
+    def __init__(self, credentials: service_account.Credentials, token_uri: str, scopes: List[str]):
+        self.credentials = credentials
+        self.token_uri = token_uri
+        self.scopes = scopes
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _make_assertion(self) -> str:
+        """Build the signed JWT assertion for the OAuth token exchange"""
+        now = int(time.time())
+        payload = {
+            "iss": self.credentials.service_account_email,
+            "scope": " ".join(self.scopes),
+            "aud": self.token_uri,
+            "iat": now,
+            "exp": now + self.TOKEN_LIFETIME_SECONDS,
+        }
+        return google_jwt.encode(self.credentials.signer, payload).decode("utf-8")
+
+    async def get_token(self, client: httpx.AsyncClient) -> str:
+        """Return a valid access token, refreshing it at most once for concurrent callers"""
+        if self._access_token and time.time() < self._expires_at:
+            return self._access_token
+
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited for the lock
+            if self._access_token and time.time() < self._expires_at:
+                return self._access_token
+
+            response = await client.post(
+                self.token_uri,
+                data={"grant_type": TOKEN_GRANT_TYPE, "assertion": self._make_assertion()},
+            )
+            if response.status_code != 200:
+                raise SheetsAPIError(response.status_code, f"Token refresh failed: {response.text}")
+
+            token_data = response.json()
+            self._access_token = token_data["access_token"]
+            expires_in = int(token_data.get("expires_in", self.TOKEN_LIFETIME_SECONDS))
+            self._expires_at = time.time() + expires_in - self.REFRESH_MARGIN_SECONDS
+            return self._access_token
+
+    def invalidate(self) -> None:
+        """Drop the cached token so the next request refreshes it"""
+        self._access_token = None
+        self._expires_at = 0.0
+
+
+class AsyncSheetsClient:
+    """Asyncio-native Google Sheets v4 client over a pooled keep-alive HTTP connection"""
+
+    def __init__(
+        self,
+        token_source: ServiceAccountTokenSource,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout: float = 30.0,
+    ):
+        self.token_source = token_source
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled connections (called on application shutdown)"""
+        await self.http.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Any] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Send an authorized request, retrying once if the token was rejected"""
+        for attempt in range(2):
+            token = await self.token_source.get_token(self.http)
+            response = await self.http.request(
+                method,
+                f"{SHEETS_API_URL}{path}",
+                params=params,
+                json=json_body,
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            if response.status_code == 401 and attempt == 0:
+                self.token_source.invalidate()
+                continue
+            break
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", {}).get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise SheetsAPIError(response.status_code, message)
+
+        return response.json() if response.content else {}
+
+    @staticmethod
+    def _range_path(spreadsheet_id: str, range_name: str) -> str:
+        return f"/{spreadsheet_id}/values/{quote(range_name, safe='')}"
+
+    async def get_spreadsheet(self, spreadsheet_id: str, fields: Optional[str] = None) -> Dict[str, Any]:
+        """spreadsheets.get - spreadsheet metadata"""
+        params = {"fields": fields} if fields else None
+        return await self._request("GET", f"/{spreadsheet_id}", params=params)
+
+    async def values_get(self, spreadsheet_id: str, range_name: str) -> Dict[str, Any]:
+        """spreadsheets.values.get"""
+        return await self._request("GET", self._range_path(spreadsheet_id, range_name))
+
+    async def values_batch_get(self, spreadsheet_id: str, ranges: List[str]) -> Dict[str, Any]:
+        """spreadsheets.values.batchGet - read several ranges in one request"""
+        return await self._request(
+            "GET",
+            f"/{spreadsheet_id}/values:batchGet",
+            params=[("ranges", range_name) for range_name in ranges],
+        )
+
+    async def values_update(
+        self,
+        spreadsheet_id: str,
+        range_name: str,
+        values: List[List[Any]],
+        value_input_option: str = "RAW",
+    ) -> Dict[str, Any]:
+        """spreadsheets.values.update"""
+        return await self._request(
+            "PUT",
+            self._range_path(spreadsheet_id, range_name),
+            params={"valueInputOption": value_input_option},
+            json_body={"values": values},
+        )
+
+    async def values_append(
+        self,
+        spreadsheet_id: str,
+        range_name: str,
+        values: List[List[Any]],
+        value_input_option: str = "RAW",
+        insert_data_option: str = "INSERT_ROWS",
+    ) -> Dict[str, Any]:
+        """spreadsheets.values.append"""
+        return await self._request(
+            "POST",
+            f"{self._range_path(spreadsheet_id, range_name)}:append",
+            params={"valueInputOption": value_input_option, "insertDataOption": insert_data_option},
+            json_body={"values": values},
+        )
+
+    async def values_batch_update(
+        self,
+        spreadsheet_id: str,
+        data: List[Dict[str, Any]],
+        value_input_option: str = "RAW",
+    ) -> Dict[str, Any]:
+        """spreadsheets.values.batchUpdate - write several ranges in one request"""
+        return await self._request(
+            "POST",
+            f"/{spreadsheet_id}/values:batchUpdate",
+            json_body={"valueInputOption": value_input_option, "data": data},
+        )
+
+    async def batch_update(self, spreadsheet_id: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """spreadsheets.batchUpdate - structural changes (insert/delete dimensions, etc.)"""
+        return await self._request(
+            "POST",
+            f"/{spreadsheet_id}:batchUpdate",
+            json_body={"requests": requests},
+        )
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one upstream call"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.upstream_calls = 0
+        self.merged_calls = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once for all concurrent callers of key and share its result"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.merged_calls += 1
+        else:
+            self.upstream_calls += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shield so one caller disconnecting does not cancel the fetch for everyone else
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, done: asyncio.Future) -> None:
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+        if not done.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            done.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "merged_calls": self.merged_calls,
+            "in_flight": len(self._inflight),
+        }
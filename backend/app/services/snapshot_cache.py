@@ -0,0 +1,155 @@
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from app.services.sheet_table import CELL_OVERHEAD_BYTES, SheetTable
+
+# Monotonic version shared by every snapshot, so a version identifies one exact load
+_snapshot_versions = itertools.count(1)
+
+
+def content_hash(values: List[List[str]]) -> str:
+    """Digest of a values array, fed row by row (unit/record separators keep cells unambiguous)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for row in values:
+        hasher.update("\x1f".join(row).encode("utf-8"))
+        hasher.update(b"\x1e")
+    return hasher.hexdigest()
+
+
+class SheetSnapshot:
+    """Values of a sheet range as fetched from Google at one point in time
+
+    size_bytes grows as indexes and memoized aggregates are built on the
+    snapshot; on_grow lets the cache holding it account for that.
+    """
+
+    def __init__(self, spreadsheet_id: str, range_name: str, values: List[List[str]]):
+        self.spreadsheet_id = spreadsheet_id
+        self.range_name = range_name
+        self.version = next(_snapshot_versions)
+        self.loaded_at = time.monotonic()
+        self.table = SheetTable.from_values(values)
+        self.table.on_grow = self._grow
+        # Identical content hashes identically across versions (drives ETags)
+        self.content_hash = content_hash(values)
+        # Aggregation results for this exact version, keyed by the normalized query
+        self.aggregates: Dict[Tuple, Any] = {}
+        self.aggregates_bytes = 0
+        self.on_grow: Optional[Callable[[int], None]] = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self.table.size_bytes + self.aggregates_bytes
+
+    def _grow(self, nbytes: int) -> None:
+        if self.on_grow is not None:
+            self.on_grow(nbytes)
+
+    def memoize_aggregate(self, key: Tuple, result: Dict[str, Any], max_entries: int) -> None:
+        """Keep an aggregation result for this version, resetting the memo when it is full"""
+        freed = 0
+        if len(self.aggregates) >= max_entries:
+            self.aggregates.clear()
+            freed = self.aggregates_bytes
+            self.aggregates_bytes = 0
+        self.aggregates[key] = result
+        # One cell per group key and metric value
+        added = len(result["groups"]) * (len(result["group_by"]) + len(result["metrics"]) + 1) * CELL_OVERHEAD_BYTES
+        self.aggregates_bytes += added
+        self._grow(added - freed)
+
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+    def to_records(self) -> List[Dict[Any, Any]]:
+        """Convert to the JSON-friendly list of row dicts"""
+        return self.table.records(self.table.positions())
+
+
+class SheetPage:
+    """One offset/limit window of a range, fetched without loading the rest of it"""
+
+    def __init__(self, headers: List[str], rows: List[List[str]], offset: int, limit: int, window_end_row: int, last_row: int):
+        # Sheets drops trailing blank rows, so a short window only means the end when it reached
+        # last_row; one row past the limit is fetched to learn whether more rows follow
+        self.has_more = len(rows) > limit or window_end_row < last_row
+        self.table = SheetTable.from_values([headers] + rows[:limit])
+        self.content_hash = content_hash([headers] + rows)
+        # Only a window that reached the last grid row knows the row count
+        self.total: Optional[int] = offset + len(rows) if not self.has_more and (rows or offset == 0) else None
+
+
+class SnapshotCache:
+    """In-process LRU cache of sheet snapshots keyed by (spreadsheet_id, range)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], SheetSnapshot]" = OrderedDict()
+        # Bytes counted into total_bytes for each entry (snapshots grow while cached)
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        # Bumped on every invalidation so fetches that raced a write are not cached
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, spreadsheet_id: str) -> int:
+        """Current write generation of a spreadsheet; pass it back to put()"""
+        return self._generations.get(spreadsheet_id, 0)
+
+    def get(self, spreadsheet_id: str, range_name: str, ttl: float) -> Optional[SheetSnapshot]:
+        """Return a snapshot no older than ttl seconds, or None"""
+        key = (spreadsheet_id, range_name)
+        snapshot = self._entries.get(key)
+        if snapshot is None:
+            return None
+        if snapshot.age() > ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return snapshot
+
+    def put(self, snapshot: SheetSnapshot, generation: int) -> None:
+        """Store a snapshot, evicting least recently used entries over the memory cap"""
+        if generation != self.generation(snapshot.spreadsheet_id):
+            # A write landed while this snapshot was being fetched
+            return
+
+        key = (snapshot.spreadsheet_id, snapshot.range_name)
+        if key in self._entries:
+            self._remove(key)
+        if snapshot.size_bytes > self.max_bytes:
+            return
+
+        self._entries[key] = snapshot
+        self._sizes[key] = snapshot.size_bytes
+        self.total_bytes += snapshot.size_bytes
+        snapshot.on_grow = lambda nbytes: self._resized(key, snapshot, nbytes)
+        self._evict()
+
+    def _resized(self, key: Tuple[str, str], snapshot: SheetSnapshot, nbytes: int) -> None:
+        """Account for an index or memo built on a cached snapshot"""
+        if self._entries.get(key) is snapshot:
+            self._sizes[key] += nbytes
+            self.total_bytes += nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def holds(self, snapshot: SheetSnapshot) -> bool:
+        """Whether this exact snapshot is the cached one (uncached and superseded loads are not)"""
+        return self._entries.get((snapshot.spreadsheet_id, snapshot.range_name)) is snapshot
+
+    def invalidate(self, spreadsheet_id: str) -> None:
+        """Drop every cached range of a spreadsheet (called after writes)"""
+        self._generations[spreadsheet_id] = self.generation(spreadsheet_id) + 1
+        for key in [key for key in self._entries if key[0] == spreadsheet_id]:
+            self._remove(key)
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        snapshot = self._entries.pop(key)
+        snapshot.on_grow = None
+        self.total_bytes -= self._sizes.pop(key)
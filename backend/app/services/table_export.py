@@ -0,0 +1,52 @@
+import csv
+import io
+from typing import Any, Dict, Iterator, Sequence
+from app.services.sheet_table import SheetTable
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # Arrow export is optional
+    pyarrow = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Rows written per CSV chunk when streaming
+CSV_CHUNK_ROWS = 1000
+
+
+def iter_csv(table: SheetTable, positions: Sequence[int]) -> Iterator[str]:
+    """Header line plus the rows at positions as CSV, a chunk at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(table.headers)
+    for start in range(0, len(positions), CSV_CHUNK_ROWS):
+        columns = table.take(positions[start:start + CSV_CHUNK_ROWS])
+        writer.writerows(["" if cell is None else cell for cell in row] for row in zip(*columns))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header line of an empty result
+        yield buffer.getvalue()
+
+
+def to_columnar(table: SheetTable, positions: Sequence[int]) -> Dict[str, Any]:
+    """{"columns": headers, "data": rows as arrays}; missing cells are null"""
+    return {
+        "columns": table.headers,
+        "data": [list(row) for row in zip(*table.take(positions))] if table.headers else []
+    }
+
+
+def to_arrow_ipc(table: SheetTable, positions: Sequence[int]) -> bytes:
+    """Rows at positions as an Arrow IPC stream of string columns"""
+    if pyarrow is None:
+        raise RuntimeError("Arrow export requires the pyarrow package")
+
+    arrays = [pyarrow.array(column, type=pyarrow.string()) for column in table.take(positions)]
+    batch = pyarrow.RecordBatch.from_arrays(arrays, names=table.headers)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
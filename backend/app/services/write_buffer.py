@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# flush_fn(spreadsheet_id, range_name, rows) appends all rows in one upstream call
+FlushFn = Callable[[str, str, List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+
+class AppendBuffer:
+    """Write-behind queue that coalesces single-row appends into multi-row appends
+
+    Rows are queued per (spreadsheet_id, range) and flushed together once
+    max_rows are waiting or max_delay seconds after the first queued row.
+    Flushes of one key run one at a time and send at most max_rows rows per
+    append, so rows land in the order they were submitted.
+    """
+
+    def __init__(self, flush_fn: FlushFn, max_rows: int, max_delay: float):
+        self.flush_fn = flush_fn
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._queues: Dict[Tuple[str, str], List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._flushes: set = set()
+
+    def submit(self, spreadsheet_id: str, range_name: str, row_data: Dict[str, Any]) -> asyncio.Future:
+        """Queue a row; the returned future resolves with the result of its batch"""
+        key = (spreadsheet_id, range_name)
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(key, [])
+        queue.append((row_data, future))
+
+        if len(queue) % self.max_rows == 0:
+            self._start_flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key))
+        return future
+
+    async def _flush_later(self, key: Tuple[str, str]) -> None:
+        await asyncio.sleep(self.max_delay)
+        # From here on this timer is an in-flight flush: shutdown must wait for it, not cancel it
+        task = asyncio.current_task()
+        if self._timers.get(key) is task:
+            del self._timers[key]
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+        await self.flush(key)
+
+    def _start_flush(self, key: Tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        task = asyncio.create_task(self.flush(key))
+        # Keep a reference so the flush is not garbage collected mid-flight
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self, key: Tuple[str, str]) -> None:
+        """Send every queued row for key, max_rows per append, after any flush already running for key"""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            while self._queues.get(key):
+                queue = self._queues[key]
+                batch = queue[:self.max_rows]
+                del queue[:self.max_rows]
+                if not queue:
+                    del self._queues[key]
+                await self._send(key, batch)
+
+    async def _send(self, key: Tuple[str, str], batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        spreadsheet_id, range_name = key
+        try:
+            result = await self.flush_fn(spreadsheet_id, range_name, [row for row, _ in batch])
+        except Exception as e:
+            print(f"Error flushing {len(batch)} buffered row(s) for {spreadsheet_id}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    # Clients that got a 202 never await their future
+                    future.exception()
+            return
+
+        for _, future in batch:
+            if not future.done():
+                future.set_result(result)
+
+    async def flush_all(self) -> None:
+        """Flush every queue and wait for in-flight flushes (application shutdown)"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*[self.flush(key) for key in list(self._queues)])
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import sheets, dynamic, dynamic_field
+from app.api.deps import clerk_jwks
 from app.db.init_db import init_db
+from app.db.session import engine
+from app.services.google_sheets import sheets_service
 
 app = FastAPI(
     title="Sheets API Generator",
@@ -19,8 +22,14 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-def startup_event():
-    init_db()
+async def startup_event():
+    await init_db()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await sheets_service.aclose()
+    await engine.dispose()
+    await clerk_jwks.aclose()
 
 app.include_router(sheets.router, prefix="/api/v1")
 app.include_router(dynamic.router, prefix="/api/v1")